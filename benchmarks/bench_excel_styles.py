@@ -0,0 +1,96 @@
+"""
+Compare per-cell style objects against the shared named styles when writing seating charts.
+
+Run from the repository root:
+    python -m benchmarks.bench_excel_styles --rooms 50
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import openpyxl
+from openpyxl.styles import Alignment, Font
+
+from seating_chart_app import seating_planner as planner
+
+
+def synthetic_rosters(size=100000):
+    """Three rosters large enough that no benchmark room runs out of roll numbers."""
+    return [[f'{prefix}{i:06d}' for i in range(size)] for prefix in ['L', 'M', 'R']]
+
+
+def write_room_inline_styles(ws, room_number, seating_df, left_name, middle_name, right_name):
+    """The previous writer: a fresh Font/Alignment for every styled cell."""
+    num_rows = seating_df['Row'].nunique()
+    ws.append([f"ROOM {room_number}"])
+    ws.merge_cells(start_row=ws.max_row, start_column=1, end_row=ws.max_row, end_column=num_rows * 4)
+    header_cell = ws.cell(row=ws.max_row, column=1)
+    header_cell.alignment = Alignment(horizontal='center')
+    header_cell.font = Font(name='Times New Roman', bold=True, size=20, underline='single')
+    ws.append([''])
+
+    current_row = ws.max_row + 1
+    for row_num in range(1, num_rows + 1):
+        cell = ws.cell(row=current_row, column=(row_num - 1) * 4 + 1, value=f"Row {row_num}")
+        ws.merge_cells(start_row=current_row, start_column=(row_num - 1) * 4 + 1, end_row=current_row, end_column=(row_num - 1) * 4 + 3)
+        cell.alignment = Alignment(horizontal='center')
+        cell.font = Font(name='Times New Roman', bold=True, size=14)
+
+    current_row += 1
+    for row_num in range(1, num_rows + 1):
+        for name, col_index in zip([left_name, middle_name, right_name], [1, 2, 3]):
+            cell = ws.cell(row=current_row, column=(row_num - 1) * 4 + col_index, value=name)
+            ws.column_dimensions[cell.column_letter].width = planner.BENCH_WIDTH
+            cell.alignment = Alignment(horizontal='center', wrap_text=True)
+            cell.font = Font(name='Times New Roman', bold=True, size=14)
+            cell.border = planner.BORDER_STYLE
+
+    current_row += 1
+    seating_grid = planner.build_seating_grid(seating_df)
+    num_rows, num_benches, num_seats = seating_grid.shape
+    for bench in range(num_benches):
+        for seat in range(num_seats):
+            for row_num in range(num_rows):
+                cell = ws.cell(row=current_row, column=row_num * 4 + seat + 1, value=seating_grid[row_num, bench, seat])
+                cell.border = planner.BORDER_STYLE
+                cell.font = Font(size=planner.ROLL_NUMBER_FONT_SIZE)
+                cell.alignment = Alignment(horizontal='center', wrap_text=True)
+        ws.row_dimensions[current_row].height = planner.BENCH_LENGTH
+        current_row += 1
+
+
+def run(writer, rooms, rows, benches, rosters, output_path):
+    """Build and save a workbook with ``rooms`` sheets; return (build seconds, save seconds)."""
+    start = time.perf_counter()
+    wb = openpyxl.Workbook()
+    roll_number_indices = [0, 0, 0]
+    for room in range(rooms):
+        seating_df, roll_number_indices, _ = planner.generate_seating_chart(
+            100 + room, rows, benches, 3, rosters, roll_number_indices
+        )
+        writer(wb.create_sheet(title=f"Room {room + 1}"), 100 + room, seating_df, 'Left', 'Middle', 'Right')
+    wb.remove(wb['Sheet'])
+    built = time.perf_counter()
+    wb.save(output_path)
+    return built - start, time.perf_counter() - built
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rooms', type=int, default=50)
+    parser.add_argument('--rows', type=int, default=5)
+    parser.add_argument('--benches', type=int, default=10)
+    args = parser.parse_args()
+
+    rosters = synthetic_rosters()
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, 'seating.xlsx')
+        for label, writer in [('inline styles', write_room_inline_styles), ('named styles', planner.write_room_sheet)]:
+            build, save = run(writer, args.rooms, args.rows, args.benches, rosters, output_path)
+            print(f"{label:>14}: build {build:7.3f}s  save {save:7.3f}s  total {build + save:7.3f}s")
+
+
+if __name__ == '__main__':
+    main()
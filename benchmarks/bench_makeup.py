@@ -0,0 +1,79 @@
+"""
+Time the makeup effects and process_frame at 480p, 720p and 1080p.
+
+Frames are synthetic faces (seating_chart_app/frame_sources.py) and the landmarks are the
+recorded ones in benchmarks/data/face_landmarks.json, so FaceMesh and any camera stay out of
+the numbers. Run from the repository root:
+    python -m benchmarks.bench_makeup --repeat 50
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+from benchmarks.harness import format_table, time_call
+from seating_chart_app.frame_sources import SyntheticSource
+from seating_chart_app.makeup_processor import EFFECTS, MakeupApplication
+
+RESOLUTIONS = {'480p': (640, 480), '720p': (1280, 720), '1080p': (1920, 1080)}
+LANDMARKS_PATH = os.path.join(os.path.dirname(__file__), 'data', 'face_landmarks.json')
+
+
+def recorded_landmarks(size):
+    """The recorded landmarks moved onto the synthetic face as drawn at ``size``."""
+    with open(LANDMARKS_PATH) as f:
+        recorded = json.load(f)
+    coords = np.array(recorded['landmarks'], dtype=np.float64)
+    recorded_width, recorded_height = recorded['size']
+    width, height = size
+    # SyntheticSource centres the face and scales it with the shorter side
+    scale = min(width, height) / min(recorded_width, recorded_height)
+    return (coords - (recorded_width / 2, recorded_height / 2)) * scale + (width / 2, height / 2)
+
+
+def effect_calls(app, coords):
+    """One callable per effect, taking the frame, with the arguments face_layers would use."""
+    points = coords.astype(np.int32)
+    upper_left_eye = app.get_upper_side_coordinates(coords[app.LEFT_EYE_INDEXES]).astype(np.int32)
+    lower_left_eyebrow = app.get_lower_side_coordinates(coords[app.LEFT_EYEBROW_INDEXES]).astype(np.int32)
+    return {
+        'eyeshadow': lambda frame: app.apply_eyeshadow(frame, upper_left_eye, lower_left_eyebrow, (170, 80, 160)),
+        'lipstick': lambda frame: app.apply_lipstick(frame, points[app.LIPS_INDEXES], (0, 0, 255)),
+        'eyeliner': lambda frame: app.draw_eyeliner(frame, upper_left_eye),
+        'blush': lambda frame: app.apply_blush(frame, points, app.CHEEK_INDEXES, app.CHIN_INDEX),
+    }
+
+
+def run(repeat=20, resolutions=tuple(RESOLUTIONS)):
+    """Return ``{benchmark name: timing stats}`` for every effect and process_frame."""
+    app = MakeupApplication(effects=EFFECTS)
+    results = {}
+    for label in resolutions:
+        size = RESOLUTIONS[label]
+        frame = SyntheticSource(size=size).read()[1]
+        coords = recorded_landmarks(size)
+
+        def fresh_frame():
+            return (frame.copy(),)
+
+        for effect, call in effect_calls(app, coords).items():
+            results[f'makeup.{effect}.{label}'] = time_call(call, repeat=repeat, setup=fresh_frame)
+
+        # The tracker asks for landmarks through detect(); hand it the recorded ones instead of FaceMesh
+        app.tracker.detect = lambda _frame, coords=coords: [coords.copy()]
+        results[f'makeup.process_frame.{label}'] = time_call(app.process_frame, repeat=repeat, setup=fresh_frame)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--resolutions', nargs='+', choices=list(RESOLUTIONS), default=list(RESOLUTIONS))
+    args = parser.parse_args()
+    print(format_table(run(args.repeat, args.resolutions)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""
+Time seating chart generation and workbook saving at 10, 100 and 1,000 rooms.
+
+Rosters are synthetic (benchmarks.bench_excel_styles.synthetic_rosters) and every room has the
+same layout, so only the room count changes. Run from the repository root:
+    python -m benchmarks.bench_seating --rooms 10 100
+"""
+
+import argparse
+import os
+import tempfile
+
+import pandas as pd
+
+from benchmarks.bench_excel_styles import synthetic_rosters
+from benchmarks.harness import format_table, time_call
+from seating_chart_app.seating_planner import SeatingPlanner, generate_seating_chart
+
+ROOM_COUNTS = (10, 100, 1000)
+
+
+def room_details(rooms, rows=5, benches=10, students_per_bench=3):
+    """A room details table like the uploaded ones, with ``rooms`` identical rooms."""
+    return pd.DataFrame({
+        'Room Number': range(101, 101 + rooms),
+        'Number of Rows': rows,
+        'Number of Bench': benches,
+        'Number of Student per Bench': students_per_bench,
+        'Left Name': 'Left',
+        'Middle Name': 'Middle',
+        'Right Name': 'Right',
+    })
+
+
+def generate_all(room_details_df, rosters):
+    # generate_seating_chart alone, room after room, without writing any workbook
+    roll_number_indices = [0, 0, 0]
+    for room_number, rows, benches in zip(room_details_df['Room Number'], room_details_df['Number of Rows'],
+                                          room_details_df['Number of Bench']):
+        _, roll_number_indices, _ = generate_seating_chart(room_number, rows, benches, 3, rosters, roll_number_indices)
+
+
+def run(repeat=3, room_counts=ROOM_COUNTS):
+    """Return ``{benchmark name: timing stats}`` for generation and saving at each room count."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        output_path = os.path.join(tmp, 'seating.xlsx')
+        for rooms in room_counts:
+            room_details_df = room_details(rooms)
+            rosters = synthetic_rosters(size=rooms * 5 * 10)
+            # The largest sizes take seconds per run, so they are repeated less
+            runs = max(1, repeat if rooms < 1000 else repeat // 3)
+            results[f'seating.generate.{rooms}_rooms'] = time_call(
+                generate_all, repeat=runs, warmup=1, setup=lambda: (room_details_df, rosters))
+            results[f'seating.save.{rooms}_rooms'] = time_call(
+                lambda: SeatingPlanner(room_details_df, rosters).save(output_path), repeat=runs, warmup=1)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--rooms', type=int, nargs='+', default=list(ROOM_COUNTS))
+    args = parser.parse_args()
+    print(format_table(run(args.repeat, args.rooms)))
+
+
+if __name__ == '__main__':
+    main()
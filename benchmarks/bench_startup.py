@@ -0,0 +1,80 @@
+"""
+Time Django start-up in fresh interpreters: ``django.setup()`` plus loading the URLconf (what a
+worker does before it can take a request), and the same followed by a first request (to the
+metrics endpoint, which touches nothing but the middleware and the view).
+
+Every run is a new ``python`` process, so the times include interpreter start-up and every
+import the project triggers. The vision and spreadsheet libraries are meant to be imported on
+first use only; each result lists which of them start-up still pulled in, under
+``heavy_modules``, and a comparison fails when that list grows. Run from the repository root:
+    python -m benchmarks.bench_startup --repeat 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.harness import format_table, time_call
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ('cv2', 'mediapipe', 'scipy', 'matplotlib', 'pandas', 'openpyxl', 'numpy')
+
+SETUP = """
+import django
+django.setup()
+from django.urls import get_resolver
+get_resolver().url_patterns
+"""
+
+FIRST_REQUEST = SETUP + """
+from django.test import Client
+assert Client(HTTP_HOST='localhost').get('/metrics').status_code == 200
+"""
+
+REPORT_MODULES = """
+import json, sys
+print(json.dumps([name for name in {modules!r} if name in sys.modules]))
+"""
+
+STAGES = {
+    'startup.urlconf': SETUP,
+    'startup.first_request': FIRST_REQUEST,
+}
+
+
+def run_child(code):
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE='seating_chart_project.settings', MAKEUP_WARM_UP='False')
+    env['PYTHONPATH'] = os.pathsep.join(filter(None, [ROOT_DIR, env.get('PYTHONPATH')]))
+    completed = subprocess.run([sys.executable, '-c', code], cwd=ROOT_DIR, env=env,
+                               capture_output=True, text=True, check=True)
+    return completed.stdout
+
+
+def loaded_heavy_modules(code):
+    return json.loads(run_child(code + REPORT_MODULES.format(modules=HEAVY_MODULES)).strip().splitlines()[-1])
+
+
+def run(repeat=5):
+    """Return ``{benchmark name: timing stats}`` for each start-up stage."""
+    results = {}
+    for name, code in STAGES.items():
+        results[name] = time_call(run_child, repeat=repeat, warmup=1, setup=lambda: (code,))
+        results[name]['heavy_modules'] = loaded_heavy_modules(code)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    results = run(args.repeat)
+    print(format_table(results))
+    for name, stats in results.items():
+        print(f"{name}: imported {', '.join(stats['heavy_modules']) or 'no heavy modules'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Timing, JSON results and baseline comparison shared by the benchmark suites.
+
+A results file looks like::
+
+    {"meta": {"python": "3.11.7", "numpy": "2.1.2", ...},
+     "results": {"makeup.lipstick.720p": {"median_s": 0.0012, "min_s": ..., "mean_s": ..., "stdev_s": ..., "repeat": 50}, ...}}
+"""
+
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+
+def time_call(fn, repeat=20, warmup=2, setup=None):
+    """
+    Time ``fn(*setup())`` ``repeat`` times after ``warmup`` untimed calls. ``setup`` (optional)
+    builds fresh arguments for every call outside the timed region, e.g. an unmodified frame.
+    """
+    for _ in range(warmup):
+        fn(*(setup() if setup else ()))
+    times = []
+    for _ in range(repeat):
+        args = setup() if setup else ()
+        start = time.perf_counter()
+        fn(*args)
+        times.append(time.perf_counter() - start)
+    return {
+        'median_s': statistics.median(times),
+        'min_s': min(times),
+        'mean_s': statistics.fmean(times),
+        'stdev_s': statistics.stdev(times) if len(times) > 1 else 0.0,
+        'repeat': repeat,
+    }
+
+
+def environment():
+    """What the numbers were measured on, so results from different machines are not mixed up."""
+    import cv2
+    import numpy as np
+    import openpyxl
+    import pandas as pd
+
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+        'pandas': pd.__version__,
+        'openpyxl': openpyxl.__version__,
+    }
+
+
+def write_results(results, path):
+    document = {'meta': environment(), 'results': results}
+    if path == '-':
+        json.dump(document, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2)
+        f.write('\n')
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare(baseline, results, threshold=0.15):
+    """
+    Compare the median of every benchmark present in both result sets.
+
+    Returns ``(rows, regressions)``: one ``(name, baseline_s, current_s, ratio, new_modules)`` row
+    per common benchmark, and the names whose median grew by more than ``threshold`` (0.15 = 15%
+    slower) or that now import ``heavy_modules`` the baseline did not (``new_modules``).
+    """
+    rows = []
+    regressions = []
+    for name in sorted(set(baseline) & set(results)):
+        before, after = baseline[name]['median_s'], results[name]['median_s']
+        ratio = after / before if before else float('inf')
+        new_modules = sorted(set(results[name].get('heavy_modules', ())) - set(baseline[name].get('heavy_modules', ())))
+        rows.append((name, before, after, ratio, new_modules))
+        if ratio > 1 + threshold or new_modules:
+            regressions.append(name)
+    return rows, regressions
+
+
+def format_table(results):
+    width = max(map(len, results), default=0)
+    return '\n'.join(f"{name:<{width}}  median {stats['median_s'] * 1000:10.3f} ms  min {stats['min_s'] * 1000:10.3f} ms"
+                     for name, stats in results.items())
+
+
+def format_comparison(rows, regressions):
+    width = max((len(row[0]) for row in rows), default=0)
+    lines = []
+    for name, before, after, ratio, new_modules in rows:
+        flag = '  REGRESSION' if name in regressions else ''
+        if new_modules:
+            flag += f" (now imports {', '.join(new_modules)})"
+        lines.append(f"{name:<{width}}  {before * 1000:10.3f} ms -> {after * 1000:10.3f} ms  x{ratio:5.2f}{flag}")
+    return '\n'.join(lines)
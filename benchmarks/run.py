@@ -0,0 +1,54 @@
+"""
+Run the benchmark suites, write the results as JSON and compare them against a baseline.
+
+Run from the repository root, e.g. on the main branch to record a baseline and then on a change:
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --output results.json --baseline baseline.json --threshold 0.15
+
+Exits with status 1 when any benchmark's median is slower than the baseline by more than the
+threshold, or when start-up imports a heavy module the baseline did not.
+"""
+
+import argparse
+import sys
+
+from benchmarks import bench_makeup, bench_seating, bench_startup
+from benchmarks.harness import compare, format_comparison, format_table, load_results, write_results
+
+SUITES = {
+    'makeup': lambda args: bench_makeup.run(repeat=args.repeat or 20),
+    'seating': lambda args: bench_seating.run(repeat=args.repeat or 3, room_counts=args.rooms),
+    'startup': lambda args: bench_startup.run(repeat=args.repeat or 5),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suite', nargs='+', choices=list(SUITES), default=list(SUITES))
+    parser.add_argument('--output', default='benchmark_results.json', help="JSON file to write ('-' for stdout)")
+    parser.add_argument('--baseline', help="Earlier results file to compare against")
+    parser.add_argument('--threshold', type=float, default=0.15,
+                        help="Slowdown (as a fraction of the baseline median) that counts as a regression")
+    parser.add_argument('--repeat', type=int, default=None, help="Timed runs per benchmark (default depends on the suite)")
+    parser.add_argument('--rooms', type=int, nargs='+', default=list(bench_seating.ROOM_COUNTS),
+                        help="Room counts for the seating suite")
+    args = parser.parse_args()
+
+    results = {}
+    for suite in args.suite:
+        results.update(SUITES[suite](args))
+    write_results(results, args.output)
+    if args.output != '-':
+        print(format_table(results))
+
+    if args.baseline:
+        rows, regressions = compare(load_results(args.baseline), results, args.threshold)
+        print(f"\nAgainst {args.baseline} (threshold {args.threshold:.0%}):")
+        print(format_comparison(rows, regressions))
+        if regressions:
+            print(f"\n{len(regressions)} regression(s)", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class SeatingChartAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "seating_chart_app"
+
+    def ready(self):
+        from . import metrics
+        metrics.enable(settings.METRICS_ENABLED)
+
+        if settings.MAKEUP_WARM_UP:
+            # Loads the MediaPipe models on background threads; startup does not wait for them
+            from .views import warm_up_makeup
+            warm_up_makeup()
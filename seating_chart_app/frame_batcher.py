@@ -0,0 +1,179 @@
+"""
+Micro-batched makeup processing for frames uploaded by browsers.
+
+Uploaded frames go onto one queue shared by a few worker threads. For each batch a worker checks
+a ``MakeupApplication`` out of a ``MakeupPool``, since a FaceMesh graph cannot be called from two
+threads at once. A worker takes the oldest frame, waits up to ``max_batch_latency`` seconds for more to
+arrive (up to ``max_batch_size``), then decodes, processes and re-encodes the batch back to back.
+OpenCV and MediaPipe release the GIL, so throughput grows with the number of workers and cores.
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+from queue import Empty, Full, Queue
+
+from .video_pipeline import StageTimer
+
+# Leading bytes of each accepted format -> (extension for cv2.imencode, content type)
+FRAME_FORMATS = {
+    b'\xff\xd8\xff': ('.jpg', 'image/jpeg'),
+    b'\x89PNG\r\n\x1a\n': ('.png', 'image/png'),
+}
+
+# Tells a worker thread to exit
+_STOP = object()
+
+
+class InvalidFrameError(ValueError):
+    """The uploaded bytes are not a JPEG or PNG image."""
+
+
+class BatcherBusy(Exception):
+    """Too many frames are already waiting to be processed."""
+
+
+def frame_format(data):
+    """Return the ``(extension, content type)`` of JPEG or PNG bytes, or None for anything else."""
+    for signature, frame_type in FRAME_FORMATS.items():
+        if data.startswith(signature):
+            return frame_type
+    return None
+
+
+class FrameBatcher:
+    """
+    Process uploaded JPEG/PNG frames on ``workers`` threads, with ``MakeupApplication`` instances
+    borrowed from ``pool`` (a ``MakeupPool``; at most ``pool.max_size`` batches run at once).
+
+    ``submit(data)`` returns a ``concurrent.futures.Future`` for the ``(bytes, content type)`` of
+    the made-up frame, in the format it was uploaded in. It raises ``BatcherBusy`` once
+    ``max_pending`` frames are waiting, so overload is turned away instead of queueing forever.
+    """
+
+    def __init__(self, pool, workers=2, max_batch_size=4, max_batch_latency=0.005, max_pending=64,
+                 jpeg_quality=None):
+        if workers < 1 or max_batch_size < 1:
+            raise ValueError("workers and max_batch_size must be at least 1")
+        self.pool = pool
+        self.workers = workers
+        self.max_batch_size = max_batch_size
+        self.max_batch_latency = max_batch_latency
+        # OpenCV is only imported once frames are handled, so importing the views stays cheap
+        self.jpeg_quality = jpeg_quality
+
+        self.pending = Queue(maxsize=max_pending)
+        self.batch_timer = StageTimer()
+        self.frames = 0
+
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, data):
+        """Queue one uploaded frame; returns a Future for the processed frame."""
+        self._start()
+        future = Future()
+        try:
+            self.pending.put_nowait((bytes(data), future))
+        except Full:
+            raise BatcherBusy(f"{self.pending.maxsize} frames are already waiting") from None
+        return future
+
+    def process(self, data, timeout=None):
+        """Blocking version of ``submit``: the ``(bytes, content type)`` of the processed frame."""
+        return self.submit(data).result(timeout)
+
+    def close(self):
+        """Let the workers finish the frames already queued, then stop them."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self.pending.put(_STOP)
+        for thread in threads:
+            thread.join()
+
+    def stats(self):
+        batches = self.batch_timer.as_dict()
+        return {
+            'workers': len(self._threads),
+            'pending': self.pending.qsize(),
+            'frames': self.frames,
+            'avg_batch_size': round(self.frames / batches['frames'], 2) if batches['frames'] else None,
+            'batch_timings': batches,
+        }
+
+    def _start(self):
+        # Workers are only started once frames start arriving
+        with self._lock:
+            if self._threads:
+                return
+            for index in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f'makeup-frame-{index}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _next_batch(self):
+        # Block for the first frame, then gather whatever else arrives before the deadline
+        first = self.pending.get()
+        if first is _STOP:
+            return None
+        batch = [first]
+        deadline = time.monotonic() + self.max_batch_latency
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.pending.get_nowait() if remaining <= 0 else self.pending.get(timeout=remaining)
+            except Empty:
+                break
+            if item is _STOP:
+                # Put it back for this worker's next round, once the batch in hand is done
+                self.pending.put(_STOP)
+                break
+            batch.append(item)
+        return batch
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+
+            start = time.perf_counter()
+            try:
+                with self.pool.borrow() as app:
+                    for data, future in batch:
+                        if not future.set_running_or_notify_cancel():
+                            continue
+                        try:
+                            future.set_result(self._process_one(app, data))
+                        except Exception as e:
+                            future.set_exception(e)
+            except Exception as e:
+                # Creating the instance failed
+                for _, future in batch:
+                    if future.set_running_or_notify_cancel():
+                        future.set_exception(e)
+
+            self.batch_timer.record(time.perf_counter() - start)
+            with self._lock:
+                self.frames += len(batch)
+
+    def _process_one(self, app, data):
+        import cv2
+        import numpy as np
+        frame_type = frame_format(data)
+        if frame_type is None:
+            raise InvalidFrameError("Frames must be JPEG or PNG images")
+        frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if frame is None:
+            raise InvalidFrameError("The frame could not be decoded")
+
+        frame = app.process_frame(frame)
+
+        extension, content_type = frame_type
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(self.jpeg_quality)] \
+            if extension == '.jpg' and self.jpeg_quality is not None else []
+        ret, buffer = cv2.imencode(extension, frame, params)
+        if not ret:
+            raise RuntimeError("The processed frame could not be encoded")
+        return buffer.tobytes(), content_type
@@ -0,0 +1,284 @@
+"""
+Frame sources for the makeup video pipeline.
+
+Every source behaves like ``cv2.VideoCapture`` (``isOpened()``, ``read()`` and ``release()``), so
+it can be handed to ``VideoPipeline``, ``FrameBroadcaster`` or ``start_video`` in place of the
+webcam: a camera, a video file, a folder of images, an RTSP/HTTP stream, or synthetic face-like
+frames for servers without any camera.
+
+``fps`` paces ``read()`` to at most that many frames per second (files, folders and synthetic
+frames are otherwise returned as fast as they can be produced) and ``size`` (width, height)
+resizes every frame. With ``buffer_count`` the frames are written into that many preallocated
+arrays taken in turn, instead of a new array per frame; OpenCV captures decode straight into
+them. A frame is then only valid until ``buffer_count`` more frames have been read, so reuse
+suits loops that finish with each frame before reading the next (``start_video``), not
+``VideoPipeline``, whose capture thread keeps reading while other stages hold older frames.
+"""
+
+import os
+import time
+
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.webp', '.tif', '.tiff')
+
+
+class FrameSource:
+    """Base class: pacing, resizing and the buffer ring; subclasses implement ``_next_frame``."""
+
+    def __init__(self, fps=None, size=None, buffer_count=0):
+        self.fps = fps or None
+        self.size = tuple(size) if size else None
+        self.buffer_count = buffer_count
+        self.frames_read = 0
+
+        self._buffers = []
+        self._buffer_index = 0
+        self._next_due = None
+
+    def isOpened(self):
+        raise NotImplementedError
+
+    def read(self):
+        """Return ``(True, frame)``, or ``(False, None)`` once the source has ended."""
+        if not self.isOpened():
+            return False, None
+        self._pace()
+        frame = self._next_frame()
+        if frame is None:
+            return False, None
+        self.frames_read += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+    def __iter__(self):
+        while True:
+            success, frame = self.read()
+            if not success:
+                return
+            yield frame
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
+
+    def _next_frame(self):
+        raise NotImplementedError
+
+    def _pace(self):
+        if self.fps is None:
+            return
+        interval = 1.0 / self.fps
+        now = time.monotonic()
+        if self._next_due is None or now - self._next_due > interval:
+            # First frame, or the consumer fell behind: restart the schedule rather than burst
+            self._next_due = now
+        elif now < self._next_due:
+            time.sleep(self._next_due - now)
+        self._next_due += interval
+
+    def _buffer(self, shape):
+        # The next preallocated array of the ring, or None when frames are not reused
+        if not self.buffer_count:
+            return None
+        if not self._buffers or self._buffers[0].shape != shape:
+            self._buffers = [np.empty(shape, dtype=np.uint8) for _ in range(self.buffer_count)]
+        buffer = self._buffers[self._buffer_index]
+        self._buffer_index = (self._buffer_index + 1) % self.buffer_count
+        return buffer
+
+    def _resized(self, frame):
+        # The frame at self.size, written into the buffer ring when there is one
+        if self.size is None or (frame.shape[1], frame.shape[0]) == self.size:
+            return frame
+        out = self._buffer((self.size[1], self.size[0]) + frame.shape[2:])
+        return cv2.resize(frame, self.size, dst=out, interpolation=cv2.INTER_AREA)
+
+
+class CaptureSource(FrameSource):
+    """Any target ``cv2.VideoCapture`` can open; ``loop`` rewinds seekable inputs at the end."""
+
+    def __init__(self, target, api_preference=cv2.CAP_ANY, loop=False, **options):
+        super().__init__(**options)
+        self.target = target
+        self.api_preference = api_preference
+        self.loop = loop
+        self.capture = cv2.VideoCapture(target, api_preference)
+        self._frame_shape = None
+        self._scratch = None
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def release(self):
+        self.capture.release()
+
+    def _next_frame(self):
+        frame = self._decode()
+        if frame is None and self.loop and self.capture.set(cv2.CAP_PROP_POS_FRAMES, 0):
+            frame = self._decode()
+        return frame
+
+    def _decode(self):
+        # Once the decoded size is known, decode into the next ring buffer (or, when the frame
+        # still has to be resized, into one reused scratch array)
+        resizing = self.size is not None and self._frame_shape is not None \
+            and (self._frame_shape[1], self._frame_shape[0]) != self.size
+        if self._frame_shape is None:
+            out = None
+        elif resizing:
+            out = self._scratch
+        else:
+            out = self._buffer(self._frame_shape)
+
+        success, frame = self.capture.read(out) if out is not None else self.capture.read()
+        if not success:
+            return None
+        self._frame_shape = frame.shape
+        if resizing:
+            self._scratch = frame
+        return self._resized(frame)
+
+
+class WebcamSource(CaptureSource):
+    """A local camera; ``fps`` and ``size`` are also requested from the device itself."""
+
+    def __init__(self, index=0, **options):
+        super().__init__(index, **options)
+        if self.size is not None:
+            self.capture.set(cv2.CAP_PROP_FRAME_WIDTH, self.size[0])
+            self.capture.set(cv2.CAP_PROP_FRAME_HEIGHT, self.size[1])
+        if self.fps is not None:
+            self.capture.set(cv2.CAP_PROP_FPS, self.fps)
+
+
+class VideoFileSource(CaptureSource):
+    """A recorded video; ``fps=True`` plays it back at its own frame rate."""
+
+    def __init__(self, path, fps=None, **options):
+        super().__init__(path, **options)
+        self.fps = (self.capture.get(cv2.CAP_PROP_FPS) or None) if fps is True else (fps or None)
+
+
+class StreamSource(CaptureSource):
+    """An RTSP or HTTP stream through FFmpeg; a dropped connection is reopened once per read."""
+
+    def __init__(self, url, reconnect=True, **options):
+        super().__init__(url, api_preference=cv2.CAP_FFMPEG, **options)
+        self.reconnect = reconnect
+        # Keep only the newest frame queued, so a slow consumer does not fall further behind
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+    def _next_frame(self):
+        frame = self._decode()
+        if frame is None and self.reconnect:
+            self.capture.release()
+            self.capture = cv2.VideoCapture(self.target, self.api_preference)
+            self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            frame = self._decode() if self.capture.isOpened() else None
+        return frame
+
+
+class ImageDirectorySource(FrameSource):
+    """The images of a folder in name order, as frames; ``loop`` starts over at the end."""
+
+    def __init__(self, path, loop=False, **options):
+        super().__init__(**options)
+        self.path = path
+        self.loop = loop
+        self.paths = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+        ) if os.path.isdir(path) else []
+        self._position = 0
+
+    def isOpened(self):
+        return bool(self.paths)
+
+    def _next_frame(self):
+        # Unreadable files are skipped; a full pass without any readable image ends the source
+        for _ in range(len(self.paths)):
+            if self._position == len(self.paths):
+                if not self.loop:
+                    return None
+                self._position = 0
+            frame = cv2.imread(self.paths[self._position], cv2.IMREAD_COLOR)
+            self._position += 1
+            if frame is not None:
+                return self._resized(frame)
+        return None
+
+
+class SyntheticSource(FrameSource):
+    """
+    Generated frames of a drawn face drifting slowly across a gradient background, for running
+    and load-testing the pipeline without a camera, 640x480 unless ``size`` says otherwise.
+    ``frames`` limits how many are produced.
+    """
+
+    SKIN = (150, 180, 225)
+    LIPS = (90, 60, 190)
+
+    def __init__(self, size=None, frames=None, **options):
+        super().__init__(size=size or (640, 480), **options)
+        self.frames = frames
+        width, height = self.size
+        ramp = np.linspace(60, 140, width, dtype=np.float32)
+        self.background = np.dstack([np.tile(ramp, (height, 1))] * 3).astype(np.uint8)
+
+    def isOpened(self):
+        return True
+
+    def _next_frame(self):
+        if self.frames is not None and self.frames_read >= self.frames:
+            return None
+        width, height = self.size
+        frame = self._buffer(self.background.shape)
+        if frame is None:
+            frame = self.background.copy()
+        else:
+            np.copyto(frame, self.background)
+
+        t = self.frames_read / 30.0
+        scale = min(width, height) / 480
+        cx = int(width / 2 + 0.08 * width * np.sin(t * 0.7))
+        cy = int(height / 2 + 0.05 * height * np.cos(t * 0.5))
+
+        def point(dx, dy):
+            return cx + int(dx * scale), cy + int(dy * scale)
+
+        def axes(ax, ay):
+            return max(1, int(ax * scale)), max(1, int(ay * scale))
+
+        cv2.ellipse(frame, (cx, cy), axes(110, 145), 0, 0, 360, self.SKIN, -1, cv2.LINE_AA)
+        for side in (-1, 1):
+            cv2.ellipse(frame, point(side * 42, -30), axes(22, 10), 0, 0, 360, (245, 245, 245), -1, cv2.LINE_AA)
+            cv2.circle(frame, point(side * 42, -30), max(1, int(7 * scale)), (40, 30, 20), -1, cv2.LINE_AA)
+            cv2.ellipse(frame, point(side * 42, -58), axes(28, 8), 0, 200, 340, (50, 40, 35), max(1, int(4 * scale)),
+                        cv2.LINE_AA)
+        cv2.line(frame, point(0, -20), point(-8, 25), (120, 150, 195), max(1, int(3 * scale)), cv2.LINE_AA)
+        cv2.ellipse(frame, point(0, 65), axes(38, 14), 0, 0, 360, self.LIPS, -1, cv2.LINE_AA)
+        return frame
+
+
+def open_frame_source(spec, loop=False, **options):
+    """
+    Open a source from a setting or command line string: a camera index (``'0'``),
+    ``'synthetic'``, an ``rtsp://`` or ``http(s)://`` URL, a folder of images or a video file.
+    ``loop`` applies to folders and files; the other options go to the source itself.
+    """
+    spec = str(spec)
+    if spec.isdigit():
+        return WebcamSource(int(spec), **options)
+    if spec == 'synthetic':
+        return SyntheticSource(**options)
+    if '://' in spec:
+        return StreamSource(spec, **options)
+    if os.path.isdir(spec):
+        return ImageDirectorySource(spec, loop=loop, **options)
+    return VideoFileSource(spec, loop=loop, **options)
@@ -0,0 +1,160 @@
+import time
+
+import cv2
+import numpy as np
+
+# Lucas-Kanade settings for carrying landmarks between detections
+LK_PARAMS = dict(winSize=(21, 21), maxLevel=3,
+                 criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+
+class OneEuroFilter:
+    """
+    One-Euro low-pass filter over a whole landmark array.
+
+    Slow movement is smoothed hard (``min_cutoff`` Hz) to remove jitter, and the cutoff rises with
+    speed (``beta``, per pixel/second) so fast head movement does not lag.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.5, d_cutoff=1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.x_prev = None
+        self.dx_prev = None
+        self.t_prev = None
+
+    @staticmethod
+    def _alpha(dt, cutoff):
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
+
+    def reset(self):
+        self.x_prev = self.dx_prev = self.t_prev = None
+
+    def __call__(self, x, t):
+        if self.x_prev is None:
+            self.x_prev, self.dx_prev, self.t_prev = x, np.zeros_like(x), t
+            return x
+
+        dt = t - self.t_prev if t > self.t_prev else 1 / 30
+        dx = (x - self.x_prev) / dt
+        a_d = self._alpha(dt, self.d_cutoff)
+        dx_hat = a_d * dx + (1 - a_d) * self.dx_prev
+
+        # Per-landmark cutoff from its own speed
+        cutoff = self.min_cutoff + self.beta * np.linalg.norm(dx_hat, axis=-1, keepdims=True)
+        a = self._alpha(dt, cutoff)
+        x_hat = a * x + (1 - a) * self.x_prev
+
+        self.x_prev, self.dx_prev, self.t_prev = x_hat, dx_hat, t
+        return x_hat
+
+
+class LandmarkTracker:
+    """
+    Run a face landmark detector every few frames and carry the landmarks in between with
+    pyramidal Lucas-Kanade optical flow.
+
+    ``detect(frame)`` returns a list of ``(N, 2)`` pixel coordinate arrays, one per face. It runs
+    every ``detection_interval`` frames, and also whenever tracking loses too many points. With
+    ``target_fps`` the interval adapts to the measured per-frame cost (reported through
+    ``frame_done``), up to ``max_interval``. ``smoothing`` passes landmarks through a One-Euro filter.
+    """
+
+    def __init__(self, detect, detection_interval=1, target_fps=None, max_interval=8, smoothing=False,
+                 min_cutoff=1.0, beta=0.5, min_tracked_fraction=0.6):
+        if detection_interval < 1:
+            raise ValueError("detection_interval must be at least 1")
+        self.detect = detect
+        self.detection_interval = detection_interval
+        self.target_fps = target_fps
+        self.max_interval = max(max_interval, detection_interval)
+        self.smoothing = smoothing
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.min_tracked_fraction = min_tracked_fraction
+
+        self.faces = []  # Last detected or tracked landmarks, before smoothing
+        self.filters = []
+        self.prev_gray = None
+        self.frames_since_detection = 0
+        self.frame_time = None  # Moving average of seconds per frame
+        self.detections = 0
+        self.tracked_frames = 0
+
+    @property
+    def tracking_enabled(self):
+        return self.detection_interval > 1 or self.target_fps is not None
+
+    def update(self, frame, timestamp=None):
+        """Return the landmark arrays for ``frame``, detecting or tracking as scheduled."""
+        timestamp = time.perf_counter() if timestamp is None else timestamp
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if self.tracking_enabled else None
+
+        faces = None
+        if gray is not None and self.faces and self.prev_gray is not None \
+                and self.frames_since_detection + 1 < self.detection_interval:
+            faces = self._track(gray)
+        if faces is None:
+            faces = self.detect(frame)
+            self.frames_since_detection = 0
+            self.detections += 1
+            self._adjust_interval()
+        else:
+            self.frames_since_detection += 1
+            self.tracked_frames += 1
+
+        # Optical flow keeps following the measured points; only the returned copies are smoothed,
+        # so tracked frames are filtered once and tracking never starts from lagging positions
+        self.prev_gray = gray
+        self.faces = faces
+        if not faces:
+            # A face that shows up later starts from its own position, not where the last one left
+            self.filters = []
+        return [self._smooth(i, coords, timestamp, len(faces)) for i, coords in enumerate(faces)]
+
+    def frame_done(self, seconds):
+        """Report how long the whole frame took, for the automatic detection interval."""
+        self.frame_time = seconds if self.frame_time is None else 0.9 * self.frame_time + 0.1 * seconds
+
+    def _track(self, gray):
+        # Track every face's points in one call; give up (and re-detect) if too many are lost
+        counts = [len(coords) for coords in self.faces]
+        previous = np.concatenate(self.faces).astype(np.float32).reshape(-1, 1, 2)
+        tracked, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, previous, None, **LK_PARAMS)
+        if tracked is None:
+            return None
+
+        faces = []
+        tracked = tracked.reshape(-1, 2).astype(np.float64)
+        status = status.ravel() == 1
+        start = 0
+        for coords, count in zip(self.faces, counts):
+            new_coords, good = tracked[start:start + count], status[start:start + count]
+            start += count
+            if good.mean() < self.min_tracked_fraction:
+                return None
+            # Lost points follow the median motion of the rest of the face
+            if not good.all():
+                new_coords[~good] = coords[~good] + np.median(new_coords[good] - coords[good], axis=0)
+            faces.append(new_coords)
+        return faces
+
+    def _smooth(self, index, coords, timestamp, face_count):
+        if not self.smoothing:
+            return coords
+        if len(self.filters) != face_count:
+            # Faces came or went, so the old filter states no longer line up
+            self.filters = [OneEuroFilter(self.min_cutoff, self.beta) for _ in range(face_count)]
+        return self.filters[index](coords, timestamp)
+
+    def _adjust_interval(self):
+        # Once per detection cycle, trade detection frequency for frame rate
+        if self.target_fps is None or self.frame_time is None:
+            return
+        budget = 1.0 / self.target_fps
+        if self.frame_time > budget and self.detection_interval < self.max_interval:
+            self.detection_interval += 1
+        elif self.frame_time < 0.7 * budget and self.detection_interval > 1:
+            self.detection_interval -= 1
@@ -0,0 +1,219 @@
+"""
+Offline makeup processing for folders of photos and recorded video files.
+
+A reader thread loads the input (image file bytes, or decoded video frames) a little ahead of
+time, frames are fanned out to a process pool with one ``MakeupApplication`` per worker, and the
+results are written back in input order. At most ``window`` frames are in flight at once, so
+memory stays flat however long the input is.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import closing
+from queue import Full, Queue
+
+import cv2
+import numpy as np
+
+from .frame_sources import IMAGE_EXTENSIONS
+from .makeup_processor import MakeupApplication
+
+# Four-character codes cv2.VideoWriter uses for each output container
+VIDEO_CODECS = {'.mp4': 'mp4v', '.m4v': 'mp4v', '.mov': 'mp4v', '.avi': 'MJPG', '.mkv': 'XVID'}
+DEFAULT_VIDEO_CODEC = 'mp4v'
+
+BatchResult = namedtuple('BatchResult', ['frames', 'failed', 'seconds'])
+
+# Marks the end of the reader thread's output
+_END = object()
+
+# The MakeupApplication of this worker process, created by _init_worker
+_worker_app = None
+
+
+class MakeupBatchError(Exception):
+    """Raised when the input cannot be read or the output cannot be written."""
+
+
+def _init_worker(app_options):
+    global _worker_app
+    # Every core already runs a worker, so OpenCV's own threads would only compete with them
+    cv2.setNumThreads(1)
+    # Photos are unrelated and video frames reach the workers interleaved, so detect every frame
+    _worker_app = MakeupApplication(static_image_mode=True, **app_options)
+
+
+def _process_image(data, extension):
+    frame = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if frame is None:
+        return None
+    ret, buffer = cv2.imencode(extension, _worker_app.process_frame(frame))
+    return buffer.tobytes() if ret else None
+
+
+def _process_video_frame(frame):
+    return _worker_app.process_frame(frame)
+
+
+def _read_ahead(items, maxsize):
+    """Iterate over ``items`` on a reader thread that stays at most ``maxsize`` items ahead."""
+    queue = Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(entry):
+        while not stop.is_set():
+            try:
+                queue.put(entry, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def reader():
+        try:
+            for item in items:
+                if not put((item, None)):
+                    return
+        except Exception as e:
+            put((_END, e))
+        else:
+            put((_END, None))
+
+    thread = threading.Thread(target=reader, name='makeup-batch-reader', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = queue.get()
+            if item is _END:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+        thread.join()
+
+
+def _map_in_order(pool, fn, items, window):
+    """
+    Submit ``fn(*args)`` for every ``(key, args)`` in ``items`` and yield ``(key, result)`` in
+    submission order, with no more than ``window`` calls outstanding.
+    """
+    pending = deque()
+    try:
+        for key, args in items:
+            pending.append((key, pool.submit(fn, *args)))
+            if len(pending) >= window:
+                key, future = pending.popleft()
+                yield key, future.result()
+        while pending:
+            key, future = pending.popleft()
+            yield key, future.result()
+    except BrokenProcessPool as e:
+        raise MakeupBatchError("A makeup worker process died") from e
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def _worker_pool(workers, app_options):
+    # Spawned rather than forked: MediaPipe graphs and the reader thread do not survive a fork
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=_init_worker, initargs=(app_options,))
+
+
+def _pool_settings(workers, window):
+    workers = workers or os.cpu_count() or 1
+    return workers, window or 2 * workers
+
+
+def process_images(input_dir, output_dir, workers=None, window=None, progress_callback=None, **app_options):
+    """
+    Apply the makeup to every image in ``input_dir``, writing each result under the same name in
+    ``output_dir``. Files that cannot be decoded are counted in ``failed`` and skipped.
+    ``app_options`` are passed on to ``MakeupApplication``.
+    """
+    try:
+        names = sorted(entry.name for entry in os.scandir(input_dir)
+                       if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS)
+    except OSError as e:
+        raise MakeupBatchError(f"Cannot read the image folder {input_dir}: {e}") from e
+    if not names:
+        raise MakeupBatchError(f"No images found in {input_dir}")
+    os.makedirs(output_dir, exist_ok=True)
+
+    def read_images():
+        # Only the file bytes are read here; decoding happens in the workers
+        for name in names:
+            with open(os.path.join(input_dir, name), 'rb') as f:
+                yield name, (f.read(), os.path.splitext(name)[1].lower())
+
+    workers, window = _pool_settings(workers, window)
+    start = time.perf_counter()
+    frames = failed = 0
+    with _worker_pool(workers, app_options) as pool, \
+            closing(_read_ahead(read_images(), window)) as images:
+        for name, data in _map_in_order(pool, _process_image, images, window):
+            if data is None:
+                failed += 1
+            else:
+                with open(os.path.join(output_dir, name), 'wb') as f:
+                    f.write(data)
+                frames += 1
+            if progress_callback:
+                progress_callback(frames + failed, len(names))
+    return BatchResult(frames, failed, time.perf_counter() - start)
+
+
+def process_video(input_path, output_path, workers=None, window=None, codec=None, progress_callback=None,
+                  **app_options):
+    """
+    Apply the makeup to every frame of the video at ``input_path`` and write it to ``output_path``
+    at the same frame rate. ``codec`` is a four-character code for ``cv2.VideoWriter``, by
+    default chosen from the output extension. ``app_options`` are passed on to ``MakeupApplication``.
+    """
+    capture = cv2.VideoCapture(input_path)
+    if not capture.isOpened():
+        raise MakeupBatchError(f"Cannot open the video {input_path}")
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    total_frames = int(capture.get(cv2.CAP_PROP_FRAME_COUNT)) or None
+    codec = codec or VIDEO_CODECS.get(os.path.splitext(output_path)[1].lower(), DEFAULT_VIDEO_CODEC)
+
+    def read_frames():
+        while True:
+            success, frame = capture.read()
+            if not success:
+                return
+            yield None, (frame,)
+
+    workers, window = _pool_settings(workers, window)
+    start = time.perf_counter()
+    frames = 0
+    writer = None
+    try:
+        with _worker_pool(workers, app_options) as pool, \
+                closing(_read_ahead(read_frames(), window)) as video_frames:
+            for _, frame in _map_in_order(pool, _process_video_frame, video_frames, window):
+                if writer is None:
+                    # The size comes from the decoded frames, which is what the writer must match
+                    height, width = frame.shape[:2]
+                    writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*codec), fps, (width, height))
+                    if not writer.isOpened():
+                        raise MakeupBatchError(f"Cannot write {output_path} with the {codec} codec")
+                writer.write(frame)
+                frames += 1
+                if progress_callback:
+                    progress_callback(frames, total_frames)
+    finally:
+        capture.release()
+        if writer is not None:
+            writer.release()
+
+    if not frames:
+        raise MakeupBatchError(f"No frames could be read from {input_path}")
+    return BatchResult(frames, 0, time.perf_counter() - start)
@@ -0,0 +1,127 @@
+"""
+A bounded pool of ``MakeupApplication`` instances.
+
+A FaceMesh graph cannot be called from two threads at once, so every thread that applies makeup
+checks an instance out of the pool and returns it when done. Instances (and the MediaPipe
+models behind them) are only created when a checkout finds none idle, up to ``max_size``, so
+importing the views no longer loads any model. ``warm()`` creates them ahead of time instead.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(TimeoutError):
+    """No instance became free within the checkout timeout."""
+
+
+def warm_up_app(app):
+    """Run FaceMesh once on a blank frame, so the first real frame does not pay for graph set-up."""
+    import numpy as np
+    app.detect_faces(np.zeros((64, 64, 3), dtype=np.uint8))
+
+
+class MakeupPool:
+    """
+    Hand out up to ``max_size`` instances made by ``factory()``; each new instance is passed to
+    ``warm_up(app)`` (if given) before its first use.
+    """
+
+    def __init__(self, factory, max_size=1, warm_up=warm_up_app):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.factory = factory
+        self.max_size = max_size
+        self.warm_up = warm_up
+
+        self._cond = threading.Condition()
+        self._idle = []
+        self._created = 0
+        self.waits = 0
+
+    def checkout(self, timeout=None):
+        """Return an idle instance, creating one if the pool is not full yet, else wait for one."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            waited = False
+            while not self._idle and self._created >= self.max_size:
+                if not waited:
+                    self.waits += 1
+                    waited = True
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise PoolTimeout(f"All {self.max_size} makeup instances are busy")
+                self._cond.wait(remaining)
+            if self._idle:
+                # The most recently returned instance has the warmest caches
+                return self._idle.pop()
+            self._created += 1
+
+        # Create outside the lock; loading the models takes a while
+        try:
+            return self._create()
+        except BaseException:
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            raise
+
+    def checkin(self, app):
+        """Return an instance taken with ``checkout``."""
+        with self._cond:
+            self._idle.append(app)
+            self._cond.notify()
+
+    @contextmanager
+    def borrow(self, timeout=None):
+        app = self.checkout(timeout)
+        try:
+            yield app
+        finally:
+            self.checkin(app)
+
+    def process_frame(self, frame):
+        """Apply the makeup to ``frame`` with whichever instance is free."""
+        with self.borrow() as app:
+            return app.process_frame(frame)
+
+    def warm(self, count=None, background=False):
+        """
+        Create up to ``count`` (default ``max_size``) instances now rather than on first use.
+        With ``background`` this runs on a daemon thread, which is returned.
+        """
+        if background:
+            thread = threading.Thread(target=self.warm, args=(count,), name='makeup-warm-up', daemon=True)
+            thread.start()
+            return thread
+
+        with self._cond:
+            missing = max(0, min(self.max_size if count is None else count, self.max_size) - self._created)
+            self._created += missing
+        for done in range(missing):
+            try:
+                app = self._create()
+            except BaseException:
+                # Give back this slot and the ones not reached yet
+                with self._cond:
+                    self._created -= missing - done
+                    self._cond.notify_all()
+                raise
+            self.checkin(app)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'max_size': self.max_size,
+                'created': self._created,
+                'idle': len(self._idle),
+                'in_use': self._created - len(self._idle),
+                'waits': self.waits,
+            }
+
+    def _create(self):
+        app = self.factory()
+        if self.warm_up is not None:
+            self.warm_up(app)
+        return app
@@ -1,109 +1,162 @@
 import cv2
-import mediapipe as mp
 import itertools
+import sys
+import time
 import numpy as np
-from scipy.interpolate import splev, splprep
+from collections import namedtuple
+
+from . import metrics
+from .frame_sources import WebcamSource, open_frame_source
+from .landmark_tracker import LandmarkTracker
+
+# One effect ready to blend: a region of the frame, the colours to blend in there (an image the
+# size of the region or a single BGR colour) and a uint8 opacity per pixel of the region
+MakeupLayer = namedtuple('MakeupLayer', ['rows', 'cols', 'source', 'alpha'])
+
+EFFECTS = ('eyeshadow', 'eyeliner', 'lipstick', 'blush')
+DEFAULT_EFFECTS = ('eyeshadow', 'eyeliner', 'lipstick')
+
+FACEMESH_SECONDS = metrics.histogram('makeup_facemesh_seconds', "FaceMesh inference time per detection")
+EFFECT_SECONDS = metrics.histogram('makeup_effect_seconds', "Time to build one makeup effect layer for one face")
+BLEND_SECONDS = metrics.histogram('makeup_blend_seconds', "Time to blend all makeup layers into a frame")
+FRAME_SECONDS = metrics.histogram('makeup_frame_seconds', "Total process_frame time")
 
 class MakeupApplication:
-    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5):
-        # Initialize mediapipe solutions
+    # Feathering blur for the eyeshadow/lipstick edges and the blush falloff
+    GRADIENT_KERNEL_SIZE = (15, 15)
+    BLUSH_KERNEL_SIZE = (99, 99)
+
+    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5, effects=DEFAULT_EFFECTS,
+                 detection_interval=1, target_fps=None, smoothing=False, inference_long_edge=None,
+                 static_image_mode=False):
+        unknown_effects = set(effects) - set(EFFECTS)
+        if unknown_effects:
+            raise ValueError(f"Unknown makeup effects: {', '.join(sorted(unknown_effects))}")
+        self.effects = tuple(effects)
+
+        # Initialize mediapipe solutions. Importing mediapipe takes most of a second (it pulls in
+        # matplotlib), so it only happens once the first instance is built.
+        import mediapipe as mp
         self.mp_drawing = mp.solutions.drawing_utils
         self.mp_drawing_styles = mp.solutions.drawing_styles
         self.mp_face_mesh = mp.solutions.face_mesh
-        self.face_mesh = self.mp_face_mesh.FaceMesh(min_detection_confidence=min_detection_confidence,
+        # static_image_mode detects from scratch every frame, for frames that are not one video
+        self.face_mesh = self.mp_face_mesh.FaceMesh(static_image_mode=static_image_mode,
+                                                    min_detection_confidence=min_detection_confidence,
                                                     min_tracking_confidence=min_tracking_confidence)
 
-        # Precompute index lists for facial landmarks
-        self.LEFT_EYE_INDEXES = list(set(itertools.chain(*self.mp_face_mesh.FACEMESH_LEFT_EYE)))
-        self.RIGHT_EYE_INDEXES = list(set(itertools.chain(*self.mp_face_mesh.FACEMESH_RIGHT_EYE)))
-        self.LIPS_INDEXES = list(set(itertools.chain(*self.mp_face_mesh.FACEMESH_LIPS)))
-        self.LEFT_EYEBROW_INDEXES = list(set(itertools.chain(*self.mp_face_mesh.FACEMESH_LEFT_EYEBROW)))
-        self.RIGHT_EYEBROW_INDEXES = list(set(itertools.chain(*self.mp_face_mesh.FACEMESH_RIGHT_EYEBROW)))
-
-    def get_upper_side_coordinates(self, eye_landmarks):
-        sorted_landmarks = sorted(eye_landmarks, key=lambda coord: coord.y)
-        half_length = len(sorted_landmarks) // 2
-        return sorted_landmarks[:half_length]
-
-    def get_lower_side_coordinates(self, eye_landmarks):
-        sorted_landmarks = sorted(eye_landmarks, key=lambda coord: coord.y)
-        half_length = len(sorted_landmarks) // 2
-        return sorted_landmarks[half_length:]
-
-    def apply_eyeshadow(self, image, eye_landmarks, eyebrow_landmarks, color, blur_kernel_size=(7, 7), blur_sigma=10, color_intensity=0.4):
-        eye_points = np.array([(int(landmarks.x * image.shape[1]), int(landmarks.y * image.shape[0])) for landmarks in eye_landmarks])
-        eyebrow_points = np.array([(int(landmarks.x * image.shape[1]), int(landmarks.y * image.shape[0])) for landmarks in eyebrow_landmarks])
-        upper_eye_points = np.array([(int(landmarks.x * image.shape[1]), int(landmarks.y * image.shape[0])) for landmarks in self.get_upper_side_coordinates(eye_landmarks)])
-
-        mask = np.zeros(image.shape[:2], dtype=np.uint8)
-        combined_points = np.concatenate([upper_eye_points, eyebrow_points[::-1]])
-        cv2.fillPoly(mask, [cv2.convexHull(combined_points)], 255)
-
-        colored_image = np.zeros_like(image)
+        # Precompute index arrays for facial landmarks
+        self.LEFT_EYE_INDEXES = np.array(list(set(itertools.chain(*self.mp_face_mesh.FACEMESH_LEFT_EYE))))
+        self.RIGHT_EYE_INDEXES = np.array(list(set(itertools.chain(*self.mp_face_mesh.FACEMESH_RIGHT_EYE))))
+        self.LIPS_INDEXES = np.array(list(set(itertools.chain(*self.mp_face_mesh.FACEMESH_LIPS))))
+        self.LEFT_EYEBROW_INDEXES = np.array(list(set(itertools.chain(*self.mp_face_mesh.FACEMESH_LEFT_EYEBROW))))
+        self.RIGHT_EYEBROW_INDEXES = np.array(list(set(itertools.chain(*self.mp_face_mesh.FACEMESH_RIGHT_EYEBROW))))
+        self.CHEEK_INDEXES = np.array([234, 454])
+        self.CHIN_INDEX = 152
+
+        # Longest side (in pixels) of the copy FaceMesh sees; None runs it at full resolution
+        self.inference_long_edge = inference_long_edge
+
+        # Run FaceMesh every detection_interval frames (or adaptively for target_fps) and track in between
+        self.tracker = LandmarkTracker(self.detect_faces, detection_interval=detection_interval,
+                                       target_fps=target_fps, smoothing=smoothing)
+
+    def landmarks_to_coordinates(self, face_landmarks, image_shape):
+        # One (N, 2) float array of pixel coordinates for every landmark of a face
+        img_height, img_width = image_shape[:2]
+        landmarks = face_landmarks.landmark
+        coords = np.fromiter(itertools.chain.from_iterable((landmark.x, landmark.y) for landmark in landmarks),
+                             dtype=np.float64, count=2 * len(landmarks)).reshape(-1, 2)
+        coords *= (img_width, img_height)
+        return coords
+
+    def get_upper_side_coordinates(self, points):
+        # Stable sort by y, so ties keep their landmark order
+        sorted_points = points[np.argsort(points[:, 1], kind='stable')]
+        half_length = len(sorted_points) // 2
+        return sorted_points[:half_length]
+
+    def get_lower_side_coordinates(self, points):
+        sorted_points = points[np.argsort(points[:, 1], kind='stable')]
+        half_length = len(sorted_points) // 2
+        return sorted_points[half_length:]
+
+    def padded_roi(self, image, x, y, width, height, pad):
+        # Slices for the box (x, y, width, height) grown by pad pixels and clipped to the image,
+        # or None when the box lies completely outside it
+        img_height, img_width = image.shape[:2]
+        x0, y0 = max(x - pad, 0), max(y - pad, 0)
+        x1, y1 = min(x + width + pad, img_width), min(y + height + pad, img_height)
+        if x0 >= x1 or y0 >= y1:
+            return None
+        return (slice(y0, y1), slice(x0, x1)), (-x0, -y0)
+
+    def tinted_layer(self, image, rows, cols, mask, color, blur_kernel_size, blur_sigma, color_intensity):
+        # Tint the masked pixels, soften them, and feather the edges through the layer's opacity
+        roi = image[rows, cols]
+        colored_image = np.zeros_like(roi)
         colored_image[:] = color
 
-        eyeshadow_image = cv2.bitwise_and(colored_image, colored_image, mask=mask)
-        eye_shadow_colored = cv2.addWeighted(image, 1, eyeshadow_image, color_intensity, 0)
-
-        blurred = cv2.GaussianBlur(eye_shadow_colored, blur_kernel_size, blur_sigma)
+        tinted_image = cv2.bitwise_and(colored_image, colored_image, mask=mask)
+        tinted = cv2.addWeighted(roi, 1, tinted_image, color_intensity, 0)
 
-        gradient_mask = cv2.GaussianBlur(mask, (15, 15), 0)
-        gradient_mask = gradient_mask / 255.0
-        eyeshadow_with_gradient = (blurred * gradient_mask[..., np.newaxis] + image * (1 - gradient_mask[..., np.newaxis])).astype(np.uint8)
+        blurred = cv2.GaussianBlur(tinted, blur_kernel_size, blur_sigma)
 
-        final_image = np.where(mask[..., np.newaxis] == 0, image, eyeshadow_with_gradient)
-        return final_image
+        gradient_mask = cv2.GaussianBlur(mask, self.GRADIENT_KERNEL_SIZE, 0)
+        gradient_mask[mask == 0] = 0  # The feathering only reaches inwards
+        return MakeupLayer(rows, cols, blurred, gradient_mask)
 
-    def apply_lipstick(self, image, landmarks, indexes, color, blur_kernel_size=(7, 7), blur_sigma=10, color_intensity=0.4):
-        points = np.array([(int(landmarks[idx].x * image.shape[1]), int(landmarks[idx].y * image.shape[0])) for idx in indexes])
+    def eyeshadow_layer(self, image, eye_points, eyebrow_points, color, blur_kernel_size=(7, 7), blur_sigma=10, color_intensity=0.4):
+        upper_eye_points = self.get_upper_side_coordinates(eye_points)
+        combined_points = np.concatenate([upper_eye_points, eyebrow_points[::-1]]).astype(np.int32)
+        hull = cv2.convexHull(combined_points)
 
-        mask = np.zeros(image.shape[:2], dtype=np.uint8)
-        cv2.fillPoly(mask, [cv2.convexHull(points)], 255)
+        # Only pixels inside the hull change, and the blurs reach at most pad pixels around them
+        pad = max(max(blur_kernel_size), max(self.GRADIENT_KERNEL_SIZE)) // 2
+        roi = self.padded_roi(image, *cv2.boundingRect(hull), pad)
+        if roi is None:
+            return None
+        (rows, cols), offset = roi
 
-        boundary_mask = cv2.dilate(mask, np.ones((3, 3), np.uint8), iterations=1)
+        mask = np.zeros(image[rows, cols].shape[:2], dtype=np.uint8)
+        cv2.fillPoly(mask, [hull], 255, offset=offset)
 
-        colored_image = np.zeros_like(image)
-        colored_image[:] = color
+        return self.tinted_layer(image, rows, cols, mask, color, blur_kernel_size, blur_sigma, color_intensity)
 
-        lipstick_image = cv2.bitwise_and(colored_image, colored_image, mask=boundary_mask)
-        lips_colored = cv2.addWeighted(image, 1, lipstick_image, color_intensity, 0)
+    def lipstick_layer(self, image, lip_points, color, blur_kernel_size=(7, 7), blur_sigma=10, color_intensity=0.4):
+        hull = cv2.convexHull(lip_points.astype(np.int32))
 
-        blurred = cv2.GaussianBlur(lips_colored, blur_kernel_size, blur_sigma)
+        # The 3x3 dilation grows the lips by one pixel before the blurs
+        pad = 1 + max(max(blur_kernel_size), max(self.GRADIENT_KERNEL_SIZE)) // 2
+        roi = self.padded_roi(image, *cv2.boundingRect(hull), pad)
+        if roi is None:
+            return None
+        (rows, cols), offset = roi
 
-        gradient_mask = cv2.GaussianBlur(boundary_mask, (15, 15), 0)
-        gradient_mask = gradient_mask / 255.0
-        lips_with_gradient = (blurred * gradient_mask[..., np.newaxis] + image * (1 - gradient_mask[..., np.newaxis])).astype(np.uint8)
+        mask = np.zeros(image[rows, cols].shape[:2], dtype=np.uint8)
+        cv2.fillPoly(mask, [hull], 255, offset=offset)
 
-        final_image = np.where(boundary_mask[..., np.newaxis] == 0, image, lips_with_gradient)
-        return final_image
-
-    def draw_eyeliner(self, image, upper_eye_coordinates, color=(14, 14, 18), thickness=1):
-        result_image = image.copy()
-
-        eyeliner_points = [(int(landmark.x * image.shape[1]), int(landmark.y * image.shape[0])) for landmark in upper_eye_coordinates]
-
-        eyeliner_points.sort(key=lambda x: x[0])
-
-        eyeliner_points = np.array(eyeliner_points, dtype=np.int32)
+        boundary_mask = cv2.dilate(mask, np.ones((3, 3), np.uint8), iterations=1)
 
-        for i in range(len(eyeliner_points) - 1):
-            start_point = tuple(eyeliner_points[i])
-            end_point = tuple(eyeliner_points[i + 1])
-            cv2.line(result_image, start_point, end_point, color, thickness)
+        return self.tinted_layer(image, rows, cols, boundary_mask, color, blur_kernel_size, blur_sigma, color_intensity)
 
-        return result_image
+    def eyeliner_layer(self, image, upper_eye_points, color=(14, 14, 18), thickness=1):
+        eyeliner_points = upper_eye_points[np.argsort(upper_eye_points[:, 0], kind='stable')].astype(np.int32)
 
-    def apply_blush(self, image, face_landmarks, cheek_indices, chin_index, color=(128, 0, 128), intensity=0.6, size_multiplier=1.0):
-        result_image = image.copy()
-        img_height, img_width = image.shape[:2]
+        roi = self.padded_roi(image, *cv2.boundingRect(eyeliner_points), thickness)
+        if roi is None:
+            return None
+        (rows, cols), offset = roi
 
-        def get_coords(index):
-            landmark = face_landmarks.landmark[index]
-            return np.array([int(landmark.x * img_width), int(landmark.y * img_height)])
+        # Join consecutive points left to right, fully opaque
+        mask = np.zeros(image[rows, cols].shape[:2], dtype=np.uint8)
+        cv2.polylines(mask, [eyeliner_points + offset], False, 255, thickness)
+        return MakeupLayer(rows, cols, color, mask)
 
+    def blush_layer(self, image, points, cheek_indices, chin_index, color=(128, 0, 128), intensity=0.6, size_multiplier=1.0):
         def compute_blush_parameters(cheek_idx, chin_idx):
-            cheek_coords = get_coords(cheek_idx)
-            chin_coords = get_coords(chin_idx)
+            cheek_coords = points[cheek_idx].astype(int)
+            chin_coords = points[chin_idx].astype(int)
 
             center_coords = cheek_coords + 0.3 * (chin_coords - cheek_coords)
             center_coords = center_coords.astype(int)
@@ -118,61 +171,134 @@ class MakeupApplication:
 
             return center_coords, axes_length
 
-        left_center, left_axes = compute_blush_parameters(cheek_indices[0], chin_index)
-        right_center, right_axes = compute_blush_parameters(cheek_indices[1], chin_index)
-
-        blush_mask = np.zeros((img_height, img_width), dtype=np.uint8)
-        cv2.ellipse(blush_mask, tuple(left_center), left_axes, 0, 0, 360, 255, -1)
-        cv2.ellipse(blush_mask, tuple(right_center), right_axes, 0, 0, 360, 255, -1)
-
-        blurred_mask = cv2.GaussianBlur(blush_mask, (99, 99), 0)
-        normalized_mask = blurred_mask / 255.0
-        normalized_mask = normalized_mask[..., np.newaxis]
-
-        blush_color_image = np.full_like(image, color)
-
-        blended_image = (image * (1 - normalized_mask * intensity) + blush_color_image * (normalized_mask * intensity)).astype(np.uint8)
-
-        return blended_image
-
-    def process_frame(self, frame):
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        ellipses = [compute_blush_parameters(cheek_idx, chin_index) for cheek_idx in cheek_indices[:2]]
+
+        # The blurred mask is zero beyond the blur radius around both ellipses (one spare pixel
+        # covers ellipse rounding), so nothing outside that box changes
+        x0 = min(center[0] - axes[0] for center, axes in ellipses)
+        y0 = min(center[1] - axes[1] for center, axes in ellipses)
+        x1 = max(center[0] + axes[0] for center, axes in ellipses)
+        y1 = max(center[1] + axes[1] for center, axes in ellipses)
+        pad = max(self.BLUSH_KERNEL_SIZE) // 2 + 2
+        roi = self.padded_roi(image, x0, y0, x1 - x0 + 1, y1 - y0 + 1, pad)
+        if roi is None:
+            return None
+        (rows, cols), (offset_x, offset_y) = roi
+
+        blush_mask = np.zeros(image[rows, cols].shape[:2], dtype=np.uint8)
+        for center, axes in ellipses:
+            cv2.ellipse(blush_mask, (int(center[0]) + offset_x, int(center[1]) + offset_y), axes, 0, 0, 360, 255, -1)
+
+        blurred_mask = cv2.GaussianBlur(blush_mask, self.BLUSH_KERNEL_SIZE, 0)
+        return MakeupLayer(rows, cols, color, cv2.convertScaleAbs(blurred_mask, alpha=intensity))
+
+    def apply_layers(self, image, layers):
+        # Blend every layer into image in place, in order, with 8-bit fixed point math:
+        # out = (source * alpha + image * (255 - alpha)) / 255, rounded down
+        for layer in layers:
+            if layer is None:
+                continue
+            region = image[layer.rows, layer.cols]
+            alpha = layer.alpha[..., np.newaxis].astype(np.uint16)
+            mixed = np.asarray(layer.source, dtype=np.uint16) * alpha
+            mixed += region * (255 - alpha)
+            # floor(x / 255) for 0 <= x <= 255 * 255, without a division
+            mixed += 1 + (mixed >> 8)
+            mixed >>= 8
+            region[:] = mixed
+        return image
+
+    def apply_eyeshadow(self, image, eye_points, eyebrow_points, color, **kwargs):
+        return self.apply_layers(image, [self.eyeshadow_layer(image, eye_points, eyebrow_points, color, **kwargs)])
+
+    def apply_lipstick(self, image, lip_points, color, **kwargs):
+        return self.apply_layers(image, [self.lipstick_layer(image, lip_points, color, **kwargs)])
+
+    def draw_eyeliner(self, image, upper_eye_points, **kwargs):
+        return self.apply_layers(image, [self.eyeliner_layer(image, upper_eye_points, **kwargs)])
+
+    def apply_blush(self, image, points, cheek_indices, chin_index, **kwargs):
+        return self.apply_layers(image, [self.blush_layer(image, points, cheek_indices, chin_index, **kwargs)])
+
+    def face_layers(self, image, coords):
+        # Every enabled effect for one face (given as (N, 2) pixel coordinates), bottom layer first
+        points = coords.astype(np.int32)
+
+        # Upper/lower halves are split on the unrounded y values, then looked up as pixels
+        upper_left_eye_points = self.get_upper_side_coordinates(coords[self.LEFT_EYE_INDEXES]).astype(np.int32)
+        lower_left_eyebrow_points = self.get_lower_side_coordinates(coords[self.LEFT_EYEBROW_INDEXES]).astype(np.int32)
+        upper_right_eye_points = self.get_upper_side_coordinates(coords[self.RIGHT_EYE_INDEXES]).astype(np.int32)
+        lower_right_eyebrow_points = self.get_lower_side_coordinates(coords[self.RIGHT_EYEBROW_INDEXES]).astype(np.int32)
+
+        layers = []
+        if 'eyeshadow' in self.effects:
+            with EFFECT_SECONDS.time(effect='eyeshadow'):
+                layers.append(self.eyeshadow_layer(image, upper_left_eye_points, lower_left_eyebrow_points, (170, 80, 160)))
+                layers.append(self.eyeshadow_layer(image, upper_right_eye_points, lower_right_eyebrow_points, (170, 80, 160)))
+        if 'eyeliner' in self.effects:
+            with EFFECT_SECONDS.time(effect='eyeliner'):
+                layers.append(self.eyeliner_layer(image, upper_left_eye_points))
+                layers.append(self.eyeliner_layer(image, upper_right_eye_points))
+        if 'lipstick' in self.effects:
+            with EFFECT_SECONDS.time(effect='lipstick'):
+                layers.append(self.lipstick_layer(image, points[self.LIPS_INDEXES], (0, 0, 255)))
+        if 'blush' in self.effects:
+            with EFFECT_SECONDS.time(effect='blush'):
+                layers.append(self.blush_layer(image, points, self.CHEEK_INDEXES, self.CHIN_INDEX))
+        return layers
+
+    def inference_image(self, frame):
+        # Downscale the frame for FaceMesh when it is larger than inference_long_edge
+        img_height, img_width = frame.shape[:2]
+        long_edge = max(img_height, img_width)
+        if self.inference_long_edge is None or long_edge <= self.inference_long_edge:
+            return frame
+        scale = self.inference_long_edge / long_edge
+        size = (max(1, round(img_width * scale)), max(1, round(img_height * scale)))
+        return cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+
+    def detect_faces(self, frame):
+        # Run FaceMesh on the frame and return one (N, 2) pixel coordinate array per face.
+        # Landmarks come back normalized, so they are scaled to the full-resolution frame
+        # even when FaceMesh ran on a smaller copy (converted to RGB after downscaling).
+        rgb_frame = cv2.cvtColor(self.inference_image(frame), cv2.COLOR_BGR2RGB)
         rgb_frame.flags.writeable = False
-        results = self.face_mesh.process(rgb_frame)
-        rgb_frame.flags.writeable = True
+        with FACEMESH_SECONDS.time():
+            results = self.face_mesh.process(rgb_frame)
 
-        if results.multi_face_landmarks:
-            for face_no, face_landmarks in enumerate(results.multi_face_landmarks):
-                left_eye_landmarks = [face_landmarks.landmark[idx] for idx in self.LEFT_EYE_INDEXES]
-                left_eyebrow_landmarks = [face_landmarks.landmark[idx] for idx in self.LEFT_EYEBROW_INDEXES]
-                upper_left_eye_coordinates = self.get_upper_side_coordinates(left_eye_landmarks)
-                lower_left_eyebrow = self.get_lower_side_coordinates(left_eyebrow_landmarks)
-                frame = self.apply_eyeshadow(frame, upper_left_eye_coordinates, lower_left_eyebrow, (170, 80, 160))
-
-                right_eye_landmarks = [face_landmarks.landmark[idx] for idx in self.RIGHT_EYE_INDEXES]
-                right_eyebrow_landmarks = [face_landmarks.landmark[idx] for idx in self.RIGHT_EYEBROW_INDEXES]
-                upper_right_eye_coordinates = self.get_upper_side_coordinates(right_eye_landmarks)
-                lower_right_eyebrow = self.get_lower_side_coordinates(right_eyebrow_landmarks)
-                frame = self.apply_eyeshadow(frame, upper_right_eye_coordinates, lower_right_eyebrow, (170, 80, 160))
-
-                frame = self.draw_eyeliner(frame, upper_left_eye_coordinates)
-                frame = self.draw_eyeliner(frame, upper_right_eye_coordinates)
-
-                frame = self.apply_lipstick(frame, face_landmarks.landmark, self.LIPS_INDEXES, (0, 0, 255))
-
-                cheek_indices = [234, 454]
-                chin_index = 152
-                # frame = self.apply_blush(frame, face_landmarks, cheek_indices, chin_index)
+        if not results.multi_face_landmarks:
+            return []
+        return [self.landmarks_to_coordinates(face_landmarks, frame.shape) for face_landmarks in results.multi_face_landmarks]
 
+    def process_frame(self, frame):
+        start = time.perf_counter()
+        faces = self.tracker.update(frame)
+
+        if faces:
+            # Gather every layer from the untouched frame, then blend them all into it in one pass
+            layers = []
+            for coords in faces:
+                layers += self.face_layers(frame, coords)
+            with BLEND_SECONDS.time():
+                self.apply_layers(frame, layers)
+
+        elapsed = time.perf_counter() - start
+        self.tracker.frame_done(elapsed)
+        if metrics.is_enabled():
+            FRAME_SECONDS.observe(elapsed)
         return frame
 
-    def start_video(self):
-        cap = cv2.VideoCapture(0)
+    def start_video(self, source=0):
+        # source is anything open_frame_source accepts: a camera index, a file, a folder, a URL or 'synthetic'.
+        # Each frame is shown before the next is read, so two reused buffers are enough.
+        cap = open_frame_source(source, buffer_count=2)
         while cap.isOpened():
             success, frame = cap.read()
             if not success:
-                print("Ignoring empty camera frame.")
-                continue
+                if isinstance(cap, WebcamSource):
+                    print("Ignoring empty camera frame.")
+                    continue
+                break
 
             frame = self.process_frame(frame)
 
@@ -185,4 +311,4 @@ class MakeupApplication:
 
 if __name__ == "__main__":
     makeup_app = MakeupApplication()
-    makeup_app.start_video()
+    makeup_app.start_video(sys.argv[1] if len(sys.argv) > 1 else 0)
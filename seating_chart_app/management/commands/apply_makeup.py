@@ -0,0 +1,51 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from seating_chart_app.makeup_batch import MakeupBatchError, process_images, process_video
+from seating_chart_app.makeup_processor import DEFAULT_EFFECTS, EFFECTS
+
+
+class Command(BaseCommand):
+    help = "Apply the makeup to a folder of images or to a video file, using a pool of worker processes."
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', help="Folder of images, or a video file")
+        parser.add_argument('output', help="Folder for the processed images, or the video file to write")
+        parser.add_argument('--workers', type=int, default=None, help="Number of worker processes (defaults to the CPU count)")
+        parser.add_argument('--window', type=int, default=None,
+                            help="Most frames in flight at once (defaults to twice the worker count)")
+        parser.add_argument('--effects', default=','.join(DEFAULT_EFFECTS),
+                            help=f"Comma-separated effects to apply, from: {', '.join(EFFECTS)}")
+        parser.add_argument('--inference-long-edge', type=int, default=None,
+                            help="Run FaceMesh on a copy downscaled to this many pixels on its longest side")
+        parser.add_argument('--codec', default=None, help="Four-character video codec (defaults to one for the output extension)")
+
+    def handle(self, *args, **options):
+        app_options = {
+            'effects': [effect.strip() for effect in options['effects'].split(',') if effect.strip()],
+            'inference_long_edge': options['inference_long_edge'],
+        }
+        unknown_effects = set(app_options['effects']) - set(EFFECTS)
+        if unknown_effects:
+            raise CommandError(f"Unknown makeup effects: {', '.join(sorted(unknown_effects))}")
+
+        try:
+            if os.path.isdir(options['input']):
+                result = process_images(options['input'], options['output'], workers=options['workers'],
+                                        window=options['window'], progress_callback=self.report_progress, **app_options)
+            else:
+                result = process_video(options['input'], options['output'], workers=options['workers'],
+                                       window=options['window'], codec=options['codec'],
+                                       progress_callback=self.report_progress, **app_options)
+        except MakeupBatchError as e:
+            raise CommandError(str(e)) from e
+
+        message = f"{result.frames} frames written to {options['output']} in {result.seconds:.1f}s"
+        if result.failed:
+            message += f" ({result.failed} images could not be read)"
+        self.stdout.write(self.style.SUCCESS(message))
+
+    def report_progress(self, frames_done, total_frames):
+        if frames_done % 100 == 0 or frames_done == total_frames:
+            self.stdout.write(f"Frame {frames_done}/{total_frames or '?'} done")
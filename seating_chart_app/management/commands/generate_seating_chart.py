@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from seating_chart_app.seating_planner import (
+    SEAT_POSITIONS, SeatingPlanError, SeatingPlanner, load_room_details, load_roll_numbers, roll_number_paths,
+)
+
+
+class Command(BaseCommand):
+    help = "Generate a seating chart workbook from a room details file without any GUI."
+
+    def add_arguments(self, parser):
+        parser.add_argument('room_details', help="Excel, CSV or Parquet file with the room details")
+        parser.add_argument('output', help="Path of the .xlsx file to write")
+        for position in SEAT_POSITIONS:
+            parser.add_argument(f'--{position.lower()}', dest=f'{position.lower()}_roll_numbers', metavar='FILE',
+                                help=f"{position} roll numbers file (defaults to the '{position} Path' column)")
+        parser.add_argument('--parallel', action='store_true', help="Render room sheets across a process pool")
+        parser.add_argument('--workers', type=int, default=None, help="Number of worker processes with --parallel")
+
+    def handle(self, *args, **options):
+        output = options['output']
+        if not output.endswith(".xlsx"):
+            output += ".xlsx"
+
+        try:
+            room_details_df = load_room_details(options['room_details'])
+            students_per_bench = int(room_details_df['Number of Student per Bench'].iloc[0])
+            paths = [options[f'{position.lower()}_roll_numbers'] for position in SEAT_POSITIONS[:students_per_bench]]
+            if not all(paths):
+                default_paths = roll_number_paths(room_details_df, students_per_bench)
+                paths = [path or default for path, default in zip(paths, default_paths)]
+            roll_numbers_lists = [load_roll_numbers(path, position) for path, position in zip(paths, SEAT_POSITIONS)]
+            planner = SeatingPlanner(room_details_df, roll_numbers_lists, progress_callback=self.report_progress)
+            planner.save(output, parallel=options['parallel'], max_workers=options['workers'])
+        except SeatingPlanError as e:
+            raise CommandError(str(e)) from e
+
+        self.stdout.write(self.style.SUCCESS(f"Seating chart saved to {output}"))
+
+    def report_progress(self, rooms_done, total_rooms):
+        self.stdout.write(f"Room {rooms_done}/{total_rooms} done")
@@ -0,0 +1,225 @@
+"""
+In-process metrics for the makeup stream and seating chart generation, in Prometheus text format.
+
+Counters and gauges are always kept, since they only change on rare events (a dropped frame) or
+are read through a callback at scrape time. Timers are optional: until ``enable()`` is called,
+``Histogram.time()`` hands back one shared no-op context manager, so an instrumented hot path
+costs a function call and a global lookup.
+
+Each timed series keeps its last ``window`` observations and reports their p50/p95/p99 as a
+Prometheus summary, together with the running ``_sum`` and ``_count``.
+"""
+
+import functools
+import threading
+import time
+from collections import deque
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+_enabled = False
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+def enable(enabled=True):
+    """Turn the timers on or off (counters and gauges are always on)."""
+    global _enabled
+    _enabled = bool(enabled)
+
+
+def is_enabled():
+    return _enabled
+
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = key + tuple(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('series', 'start')
+
+    def __init__(self, series):
+        self.series = series
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.series.observe(time.perf_counter() - self.start)
+        return False
+
+
+class _Series:
+    """The rolling window, sum and count of one label set of a Histogram."""
+
+    def __init__(self, window):
+        self.lock = threading.Lock()
+        self.recent = deque(maxlen=window)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        with self.lock:
+            self.recent.append(value)
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        with self.lock:
+            return sorted(self.recent), self.sum, self.count
+
+
+class _Metric:
+    type = None
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} {self.type}']
+        lines += self._sample_lines()
+        return lines
+
+    def _sample_lines(self):
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """A monotonically increasing count per label set, or the value of ``fn()`` at scrape time."""
+
+    type = 'counter'
+
+    def __init__(self, name, help_text, fn=None):
+        super().__init__(name, help_text)
+        self.fn = fn
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _sample_lines(self):
+        if self.fn is not None:
+            return [f'{self.name} {self.fn()}']
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(key)} {value}' for key, value in values]
+
+
+class Gauge(Counter):
+    """A value that goes up and down, set directly or read from ``fn()`` at scrape time."""
+
+    type = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """Rolling-window timings per label set, exported as a summary with p50/p95/p99."""
+
+    type = 'summary'
+
+    def __init__(self, name, help_text, window=1024):
+        super().__init__(name, help_text)
+        self.window = window
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def _get_series(self, key):
+        series = self._series.get(key)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(key, _Series(self.window))
+        return series
+
+    def observe(self, seconds, **labels):
+        self._get_series(_label_key(labels)).observe(seconds)
+
+    def time(self, **labels):
+        """Context manager timing its block, or a no-op while the timers are disabled."""
+        if not _enabled:
+            return _NULL_TIMER
+        return _Timer(self._get_series(_label_key(labels)))
+
+    def timed(self, **labels):
+        """Decorator form of ``time()``."""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _sample_lines(self):
+        with self._lock:
+            series = sorted(self._series.items())
+        lines = []
+        for key, values in series:
+            recent, total, count = values.snapshot()
+            for quantile in QUANTILES:
+                value = recent[min(len(recent) - 1, int(quantile * len(recent)))] if recent else float('nan')
+                lines.append(f'{self.name}{_format_labels(key, [("quantile", quantile)])} {value}')
+            lines.append(f'{self.name}_sum{_format_labels(key)} {total}')
+            lines.append(f'{self.name}_count{_format_labels(key)} {count}')
+        return lines
+
+
+def _register(cls, name, *args, **kwargs):
+    # Return the existing metric for a name, so modules can declare theirs at import time
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, *args, **kwargs)
+        return metric
+
+
+def counter(name, help_text, fn=None):
+    return _register(Counter, name, help_text, fn)
+
+
+def gauge(name, help_text, fn=None):
+    return _register(Gauge, name, help_text, fn)
+
+
+def histogram(name, help_text, window=1024):
+    return _register(Histogram, name, help_text, window)
+
+
+def render():
+    """Every registered metric in the Prometheus text exposition format."""
+    with _registry_lock:
+        metrics = sorted(_registry.values(), key=lambda metric: metric.name)
+    lines = []
+    for metric in metrics:
+        lines += metric.render()
+    return '\n'.join(lines) + '\n'
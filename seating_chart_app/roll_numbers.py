@@ -0,0 +1,175 @@
+"""
+Compact in-memory storage for roll number rosters.
+
+A roster loaded as a Python list keeps one boxed object per student for the whole run. Most
+rosters follow a ``<prefix><digits>`` pattern (``CS2023001``) or are plain integers, so they are
+stored as a small prefix table plus NumPy code and number arrays instead. Anything else falls back
+to a single packed UTF-8 buffer with an offsets array, the way Arrow stores string columns.
+
+Both containers behave like read-only sequences: ``len()``, indexing, contiguous slicing (which
+returns a view of the same kind) and ``np.asarray(..., dtype=object)`` give back the original
+values, so ``generate_seating_chart`` can slice them exactly like lists.
+"""
+
+import re
+from collections.abc import Sequence
+
+import numpy as np
+
+ROLL_NUMBER_PATTERN = re.compile(r'(.*?)([0-9]{1,18})')
+MAX_PREFIXES = 1 << 16
+
+
+class _CompactRollNumbers(Sequence):
+    """Shared sequence behaviour; subclasses implement ``__len__``, ``nbytes``, ``_slice``, ``_decode_one`` and ``_decode``."""
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(len(self))
+            if step == 1:
+                return self._slice(start, max(start, stop))
+            return compact_roll_numbers(self._decode()[key].tolist())
+
+        index = range(len(self))[key]
+        return self._decode_one(index)
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+    def __array__(self, dtype=None, copy=None):
+        values = self._decode()
+        return values if dtype is None or np.dtype(dtype) == object else values.astype(dtype)
+
+    def __repr__(self):
+        return f"<{type(self).__name__} len={len(self)} nbytes={self.nbytes}>"
+
+    def tolist(self):
+        return self._decode().tolist()
+
+
+class PrefixedRollNumbers(_CompactRollNumbers):
+    """
+    Roll numbers stored as a prefix table plus per-entry codes and integers.
+
+    Each table entry is ``(prefix, width)`` and decodes to ``f'{prefix}{number:0{width}d}'``, which
+    keeps leading zeros. A ``None`` prefix marks values that were plain integers.
+    """
+
+    def __init__(self, prefixes, codes, numbers):
+        self.prefixes = prefixes
+        self.codes = codes
+        self.numbers = numbers
+
+    @classmethod
+    def encode(cls, values):
+        """Return a PrefixedRollNumbers for ``values``, or None if any value does not fit the pattern."""
+        table = {}
+        codes = []
+        numbers = []
+        for value in values:
+            if isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+                key, number = (None, 0), int(value)
+                if not -(1 << 63) <= number < (1 << 63):
+                    return None
+            elif isinstance(value, str):
+                match = ROLL_NUMBER_PATTERN.fullmatch(value)
+                if match is None:
+                    return None
+                prefix, digits = match.groups()
+                key, number = (prefix, len(digits)), int(digits)
+            else:
+                return None
+
+            code = table.setdefault(key, len(table))
+            if code >= MAX_PREFIXES:
+                return None
+            codes.append(code)
+            numbers.append(number)
+
+        code_dtype = np.uint8 if len(table) <= 1 << 8 else np.uint16
+        number_dtype = np.uint32 if 0 <= min(numbers, default=0) and max(numbers, default=0) < 1 << 32 else np.int64
+        return cls(list(table), np.array(codes, dtype=code_dtype), np.array(numbers, dtype=number_dtype))
+
+    def __len__(self):
+        return len(self.codes)
+
+    @property
+    def nbytes(self):
+        return self.codes.nbytes + self.numbers.nbytes
+
+    def _slice(self, start, stop):
+        return PrefixedRollNumbers(self.prefixes, self.codes[start:stop], self.numbers[start:stop])
+
+    def _decode_one(self, index):
+        prefix, width = self.prefixes[self.codes[index]]
+        number = int(self.numbers[index])
+        return number if prefix is None else f'{prefix}{number:0{width}d}'
+
+    def _decode(self):
+        values = np.empty(len(self), dtype=object)
+        if not len(self):
+            return values
+        # Rosters (and the slices taken per room) usually share a single prefix
+        codes = [self.codes[0]] if (self.codes == self.codes[0]).all() else np.unique(self.codes)
+        for code in codes:
+            prefix, width = self.prefixes[code]
+            mask = slice(None) if len(codes) == 1 else self.codes == code
+            numbers = self.numbers[mask].tolist()
+            values[mask] = numbers if prefix is None else [f'{prefix}{number:0{width}d}' for number in numbers]
+        return values
+
+
+class PackedRollNumbers(_CompactRollNumbers):
+    """Arbitrary string roll numbers packed into one UTF-8 buffer, delimited by an offsets array."""
+
+    def __init__(self, buffer, offsets):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    @classmethod
+    def encode(cls, values):
+        """Return a PackedRollNumbers for ``values``, or None if any value is not a string."""
+        if not all(isinstance(value, str) for value in values):
+            return None
+        encoded = [value.encode('utf-8') for value in values]
+        lengths = [len(value) for value in encoded]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int32 if sum(lengths) < 1 << 31 else np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    @property
+    def nbytes(self):
+        return self.buffer.nbytes + self.offsets.nbytes
+
+    def _slice(self, start, stop):
+        # Rebase the offsets so the slice (and its pickled form) only covers its own bytes
+        offsets = self.offsets[start:stop + 1]
+        return PackedRollNumbers(self.buffer[offsets[0]:offsets[-1]], offsets - offsets[0])
+
+    def _decode_one(self, index):
+        return self.buffer[self.offsets[index]:self.offsets[index + 1]].tobytes().decode('utf-8')
+
+    def _decode(self):
+        data = self.buffer.tobytes()
+        bounds = self.offsets.tolist()
+        values = np.empty(len(self), dtype=object)
+        values[:] = [data[start:stop].decode('utf-8') for start, stop in zip(bounds, bounds[1:])]
+        return values
+
+
+def compact_roll_numbers(values):
+    """
+    Store a roster compactly: prefix + integer encoding when every value fits it, otherwise a
+    packed string buffer. Rosters mixing other types (floats, dates) are returned as a list.
+    """
+    if isinstance(values, _CompactRollNumbers):
+        return values
+    values = list(values)
+    for container in (PrefixedRollNumbers, PackedRollNumbers):
+        compact = container.encode(values)
+        if compact is not None:
+            return compact
+    return values
@@ -0,0 +1,213 @@
+"""
+Background seating chart generation for the upload endpoint.
+
+Jobs run on a small in-process thread pool, so the request that submits a job returns
+immediately. Each job keeps its uploads, status and finished workbook in its own directory
+under ``settings.SEATING_CHART_JOBS_DIR``, which lets any gunicorn worker answer status and
+download requests for it.
+
+A job only runs inside the worker that accepted it. If that worker is recycled or killed the job
+can never finish, so a queued or running job whose owning process has exited, or a running job
+that has not reported progress for ``settings.SEATING_CHART_JOB_TIMEOUT`` seconds, is reported
+as failed. Queued jobs may wait behind others for any length of time, so they never time out.
+"""
+
+import json
+import os
+import shutil
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+
+STATUS_FILENAME = 'status.json'
+RESULT_FILENAME = 'seating_chart.xlsx'
+# Bookkeeping kept in the status file but not reported to clients
+OWNER_FIELDS = ('owner_pid', 'owner_host', 'updated_at')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.SEATING_CHART_WORKERS,
+                                           thread_name_prefix='seating-chart')
+        return _executor
+
+
+def job_dir(job_id):
+    return os.path.join(settings.SEATING_CHART_JOBS_DIR, job_id)
+
+
+def result_path(job_id):
+    return os.path.join(job_dir(job_id), RESULT_FILENAME)
+
+
+def _write_status(job_id, **status):
+    """Atomically replace a job's status file, stamped with the writing process and time."""
+    status.update(owner_pid=os.getpid(), owner_host=socket.gethostname(), updated_at=time.time())
+    path = os.path.join(job_dir(job_id), STATUS_FILENAME)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(status, f)
+    os.replace(tmp_path, path)
+
+
+def _read_status(job_id):
+    try:
+        with open(os.path.join(job_dir(job_id), STATUS_FILENAME)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _process_exists(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass  # Alive, just owned by another user
+    return True
+
+
+def _is_stale(status):
+    """Whether a queued or running job can no longer finish."""
+    if status['state'] not in ('queued', 'running'):
+        return False
+    # The timeout only starts once a worker thread has picked the job up
+    idle = time.time() - status.get('updated_at', 0)
+    if status['state'] == 'running' and idle > settings.SEATING_CHART_JOB_TIMEOUT:
+        return True
+    # The owner's pid can only be checked from the same machine
+    owner_pid = status.get('owner_pid')
+    return owner_pid is not None and status.get('owner_host') == socket.gethostname() and not _process_exists(owner_pid)
+
+
+def _fail_if_stale(job_id, status):
+    if not _is_stale(status):
+        return status
+    status = {key: value for key, value in status.items() if key not in OWNER_FIELDS}
+    status.update(state='failed', error="Seating chart generation was interrupted. Please upload the files again.")
+    try:
+        _write_status(job_id, **status)
+    except OSError:
+        pass  # Purged meanwhile
+    return status
+
+
+def get_status(job_id):
+    """Return a job's status dict, or None if the job does not exist (or has expired)."""
+    status = _read_status(job_id)
+    if status is None:
+        return None
+    status = _fail_if_stale(job_id, status)
+    return {key: value for key, value in status.items() if key not in OWNER_FIELDS}
+
+
+def _save_upload(directory, name, uploaded_file):
+    extension = os.path.splitext(uploaded_file.name)[1].lower() or '.xlsx'
+    path = os.path.join(directory, f'{name}{extension}')
+    with open(path, 'wb') as f:
+        for chunk in uploaded_file.chunks():
+            f.write(chunk)
+    return path
+
+
+def _purge_expired_jobs():
+    """Remove job directories older than SEATING_CHART_JOB_TTL seconds and fail abandoned jobs."""
+    cutoff = time.time() - settings.SEATING_CHART_JOB_TTL
+    try:
+        entries = list(os.scandir(settings.SEATING_CHART_JOBS_DIR))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+        if entry.stat().st_mtime < cutoff:
+            shutil.rmtree(entry.path, ignore_errors=True)
+            continue
+        try:
+            status = _read_status(entry.name)
+        except (OSError, ValueError):
+            continue
+        if status is not None:
+            _fail_if_stale(entry.name, status)
+
+
+def submit(room_details_file, roll_number_files):
+    """
+    Queue generation for uploaded files and return the new job id.
+
+    ``roll_number_files`` holds the Left, Middle and Right roster uploads in that order. The
+    uploads are copied into the job directory first, since Django discards them once the
+    request finishes.
+    """
+    from .seating_planner import SEAT_POSITIONS
+
+    _purge_expired_jobs()
+
+    job_id = str(uuid.uuid4())
+    directory = job_dir(job_id)
+    os.makedirs(directory)
+
+    room_details_path = _save_upload(directory, 'room_details', room_details_file)
+    roll_number_paths = [
+        _save_upload(directory, f'{position.lower()}_roll_numbers', uploaded_file)
+        for position, uploaded_file in zip(SEAT_POSITIONS, roll_number_files)
+    ]
+
+    _write_status(job_id, state='queued', rooms_done=0, total_rooms=None, error=None)
+    _get_executor().submit(_run_job, job_id, room_details_path, roll_number_paths)
+    return job_id
+
+
+def _remove_partial_result(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _run_job(job_id, room_details_path, roll_number_paths):
+    # pandas and openpyxl are only imported once the first job runs, not with the URLconf
+    from .seating_planner import SEAT_POSITIONS, SeatingPlanError, SeatingPlanner, load_room_details, load_roll_numbers
+
+    def report_progress(rooms_done, total_rooms):
+        _write_status(job_id, state='running', rooms_done=rooms_done, total_rooms=total_rooms, error=None)
+
+    total_rooms = None
+    # Write next to the final name and rename, so downloads never see a partial file
+    tmp_path = f"{result_path(job_id)}.tmp"
+    # Mark the job as picked up before loading anything, which starts its progress timeout
+    report_progress(0, total_rooms)
+    try:
+        room_details_df = load_room_details(room_details_path)
+        total_rooms = len(room_details_df.index)
+        report_progress(0, total_rooms)
+
+        students_per_bench = int(room_details_df['Number of Student per Bench'].iloc[0])
+        # Uploaded rosters are not cached: the copies in the job directory expire with the job
+        roll_numbers_lists = [
+            load_roll_numbers(path, position, cache_dir='')
+            for path, position in zip(roll_number_paths[:students_per_bench], SEAT_POSITIONS)
+        ]
+        planner = SeatingPlanner(room_details_df, roll_numbers_lists, progress_callback=report_progress)
+
+        planner.save(tmp_path)
+        os.replace(tmp_path, result_path(job_id))
+    except SeatingPlanError as e:
+        _remove_partial_result(tmp_path)
+        _write_status(job_id, state='failed', rooms_done=0, total_rooms=total_rooms, error=str(e))
+    except Exception as e:
+        _remove_partial_result(tmp_path)
+        _write_status(job_id, state='failed', rooms_done=0, total_rooms=total_rooms,
+                      error=f"Failed to generate seating chart: {e}")
+    else:
+        _write_status(job_id, state='done', rooms_done=total_rooms, total_rooms=total_rooms, error=None)
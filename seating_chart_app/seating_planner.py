@@ -0,0 +1,759 @@
+"""
+Headless seating chart generation.
+
+Everything here works on plain DataFrames, roll number sequences and file paths or file
+objects, so it can run from Django views, batch jobs and the command line. The Tk GUI in
+``seating_chart_project/seating_chart_generator.py`` is a thin wrapper around it.
+"""
+
+import hashlib
+import io
+import json
+import os
+import posixpath
+import tempfile
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait
+from collections import namedtuple
+from copy import copy
+from functools import lru_cache
+from xml.etree import ElementTree
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Border, Side, Font, NamedStyle
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format
+from openpyxl.utils import column_index_from_string, get_column_letter
+from openpyxl.worksheet.cell_range import CellRange
+
+from . import metrics
+from .roll_numbers import compact_roll_numbers
+
+
+# Constants
+SEAT_POSITIONS = ["Left", "Middle", "Right"]
+REQUIRED_COLUMNS = ['Room Number', 'Number of Rows', 'Number of Bench', 'Number of Student per Bench',
+                    'Left Path', 'Middle Path', 'Right Path', 'Left Name', 'Middle Name', 'Right Name']
+# Supported table formats by file extension; anything else is read as .xlsx
+TABLE_FORMATS = {'.csv': 'csv', '.parquet': 'parquet', '.pq': 'parquet', '.xls': 'xls', '.xlsx': 'xlsx', '.xlsm': 'xlsx'}
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+# Parsed rosters are cached here, keyed by file content hash; set SEATING_CHART_CACHE_DIR to '' to disable
+ROLL_NUMBER_CACHE_DIR = os.environ.get('SEATING_CHART_CACHE_DIR',
+                                       os.path.join(os.path.expanduser('~'), '.cache', 'seating_chart'))
+ROLL_NUMBER_CACHE_VERSION = 1
+
+BORDER_STYLE = Border(left=Side(style='medium'), right=Side(style='medium'),
+                      top=Side(style='medium'), bottom=Side(style='medium'))
+
+# Bench dimensions (13.57mm width and 50mm length) and roll number font size
+BENCH_WIDTH = 13.57
+BENCH_LENGTH = 50
+ROW_BLOCK_WIDTH = 4  # Three seat columns plus a spacer column per row of benches
+ROLL_NUMBER_FONT_SIZE = 16
+
+# Named styles shared by every seating chart sheet; built once here and registered per workbook
+ROOM_HEADER_STYLE = NamedStyle(name='Room Header',
+                               font=Font(name='Times New Roman', bold=True, size=20, underline='single'),
+                               alignment=Alignment(horizontal='center'))
+ROW_HEADER_STYLE = NamedStyle(name='Row Header',
+                              font=Font(name='Times New Roman', bold=True, size=14),
+                              alignment=Alignment(horizontal='center'))
+SEAT_HEADER_STYLE = NamedStyle(name='Seat Header',
+                               font=Font(name='Times New Roman', bold=True, size=14),
+                               alignment=Alignment(horizontal='center', wrap_text=True),
+                               border=BORDER_STYLE)
+ROLL_NUMBER_STYLE = NamedStyle(name='Roll Number',
+                               font=Font(size=ROLL_NUMBER_FONT_SIZE),
+                               alignment=Alignment(horizontal='center', wrap_text=True),
+                               border=BORDER_STYLE)
+NAMED_STYLES = [ROOM_HEADER_STYLE, ROW_HEADER_STYLE, SEAT_HEADER_STYLE, ROLL_NUMBER_STYLE]
+
+# Timings exported at /metrics when metrics are enabled
+LOAD_SECONDS = metrics.histogram('seating_load_seconds', "Time to load a room details or roll numbers file")
+GENERATE_SECONDS = metrics.histogram('seating_generate_seconds', "Time to lay out the seats of one room")
+RENDER_SECONDS = metrics.histogram('seating_render_seconds', "Time to write one room sheet, or all of them in parallel mode")
+SAVE_SECONDS = metrics.histogram('seating_save_seconds', "Time to write out a finished workbook")
+
+
+# Sheet geometry of one room; columns are 1-based worksheet column numbers
+RoomLayout = namedtuple('RoomLayout', [
+    'num_rows', 'num_benches', 'num_seats', 'num_columns',
+    'row_header_spans',  # (first, last) merged header columns for each row of benches
+    'name_columns',      # column of each seat name header, row block by row block
+    'seat_columns',      # column of each (row, seat) roll number within a bench line
+])
+
+
+class SeatingPlanError(ValueError):
+    """Raised when room details or roll number files cannot be used to build a seating plan."""
+
+
+def _source_name(source):
+    return os.fspath(source) if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', '') or ''
+
+
+def _file_format(source):
+    """Work out the table format of a path or uploaded file from its extension (Excel by default)."""
+    extension = os.path.splitext(_source_name(source))[1].lower()
+    return TABLE_FORMATS.get(extension, 'xlsx')
+
+
+def _read_source_bytes(source):
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return f.read()
+    return source.read()
+
+
+def _read_table(data, file_format):
+    """Read a whole table from raw file contents."""
+    buffer = io.BytesIO(data)
+    if file_format == 'csv':
+        return pd.read_csv(buffer)
+    if file_format == 'parquet':
+        return pd.read_parquet(buffer)
+    return pd.read_excel(buffer)
+
+
+def _xlsx_first_sheet_path(archive):
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    rel_id = workbook.find(f'{XLSX_NS}sheets/{XLSX_NS}sheet').get(f'{XLSX_REL_NS}id')
+    for rel in ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels')):
+        if rel.get('Id') == rel_id:
+            target = rel.get('Target')
+            return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+    raise KeyError(rel_id)
+
+
+def _xlsx_text(string_item):
+    """The text of an ``<si>`` or ``<is>`` element, leaving out phonetic (``<rPh>``) runs."""
+    texts = []
+    for child in string_item:
+        if child.tag == f'{XLSX_NS}r':
+            child = child.find(f'{XLSX_NS}t')
+        elif child.tag != f'{XLSX_NS}t':
+            continue
+        if child is not None:
+            texts.append(child.text or '')
+    return ''.join(texts)
+
+
+def _xlsx_shared_strings(archive):
+    if 'xl/sharedStrings.xml' not in archive.namelist():
+        return []
+    shared_strings = []
+    for _, element in ElementTree.iterparse(archive.open('xl/sharedStrings.xml')):
+        if element.tag == f'{XLSX_NS}si':
+            shared_strings.append(_xlsx_text(element))
+            element.clear()
+    return shared_strings
+
+
+def _xlsx_date_styles(archive):
+    """Indexes of the cell styles whose number format shows a date or time."""
+    if 'xl/styles.xml' not in archive.namelist():
+        return set()
+    styles = ElementTree.fromstring(archive.read('xl/styles.xml'))
+    formats = dict(BUILTIN_FORMATS)
+    for number_format in styles.iterfind(f'{XLSX_NS}numFmts/{XLSX_NS}numFmt'):
+        formats[int(number_format.get('numFmtId'))] = number_format.get('formatCode')
+    return {
+        index for index, xf in enumerate(styles.iterfind(f'{XLSX_NS}cellXfs/{XLSX_NS}xf'))
+        if is_date_format(formats.get(int(xf.get('numFmtId', 0))))
+    }
+
+
+def _xlsx_cell_value(cell, shared_strings):
+    cell_type = cell.get('t')
+    if cell_type == 'inlineStr':
+        string_item = cell.find(f'{XLSX_NS}is')
+        return _xlsx_text(string_item) if string_item is not None else None
+    value_element = cell.find(f'{XLSX_NS}v')
+    if value_element is None or value_element.text is None or cell_type == 'e':
+        return None
+    value = value_element.text
+    if cell_type == 's':
+        return shared_strings[int(value)]
+    if cell_type in (None, 'n'):
+        number = float(value)
+        return int(number) if number.is_integer() else number
+    if cell_type == 'b':
+        return value == '1'
+    return value
+
+
+def _read_xlsx_column(data, column_name):
+    """
+    Stream one column out of an .xlsx file's first sheet, or return None if no header matches.
+
+    Only the header row and the matching column are decoded, which is several times faster than
+    building a full DataFrame for large rosters. The ``r`` attributes of rows and cells are
+    optional, so without them a cell takes the position after the previous one. Raises
+    ValueError for date cells in the column, which are left to pandas to convert.
+    """
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        shared_strings = _xlsx_shared_strings(archive)
+        date_styles = _xlsx_date_styles(archive)
+        header_seen = False
+        column = None
+        values = []
+        for _, element in ElementTree.iterparse(archive.open(_xlsx_first_sheet_path(archive))):
+            if element.tag != f'{XLSX_NS}row':
+                continue
+            cells = element.findall(f'{XLSX_NS}c')
+            position = 0
+            for cell in cells:
+                reference = cell.get('r')
+                position = column_index_from_string(reference.rstrip('0123456789')) if reference else position + 1
+                if not header_seen:
+                    value = _xlsx_cell_value(cell, shared_strings)
+                    if value is not None and str(value).strip() == column_name:
+                        column = position
+                elif position == column:
+                    if cell.get('t') == 'd' or (cell.get('t') in (None, 'n') and int(cell.get('s', 0)) in date_styles):
+                        # Dates are stored as serial numbers; pandas turns them into Timestamps
+                        raise ValueError("Roll Number column holds dates")
+                    # Blank cells count as missing, the same as pandas' dropna()
+                    value = _xlsx_cell_value(cell, shared_strings)
+                    if value is not None and value != '':
+                        values.append(value)
+            # The first row with any cells is the header
+            header_seen = header_seen or bool(cells)
+            element.clear()
+    return values if column is not None else None
+
+
+def _read_roll_number_column(data, file_format):
+    """Read just the 'Roll Number' column, or return None if the file has no such column."""
+    if file_format == 'xlsx':
+        try:
+            return _read_xlsx_column(data, 'Roll Number')
+        except (KeyError, ValueError, AttributeError, IndexError, ElementTree.ParseError, zipfile.BadZipFile):
+            # Workbooks the streaming reader does not understand still load through pandas
+            pass
+
+    if file_format == 'csv':
+        # Read as text so roll numbers such as 00123 keep their leading zeros
+        df = pd.read_csv(io.BytesIO(data), usecols=lambda col: col.strip() == 'Roll Number', dtype=str)
+    elif file_format == 'parquet':
+        import pyarrow.parquet as pq
+        names = [name for name in pq.read_schema(io.BytesIO(data)).names if name.strip() == 'Roll Number']
+        df = pd.read_parquet(io.BytesIO(data), columns=names[:1])
+    else:
+        df = pd.read_excel(io.BytesIO(data))
+        df = df.loc[:, df.columns.astype(str).str.strip() == 'Roll Number']
+
+    if df.columns.empty:
+        return None
+    return df.iloc[:, 0].dropna().tolist()
+
+
+def _cache_path(cache_dir, file_format, data):
+    digest = hashlib.sha256(file_format.encode() + b'\0' + data).hexdigest()
+    return os.path.join(cache_dir, f'roll_numbers-v{ROLL_NUMBER_CACHE_VERSION}-{digest}.json')
+
+
+def _load_cached_roll_numbers(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _store_cached_roll_numbers(path, roll_numbers):
+    """Best-effort cache write; rosters with values JSON cannot hold are simply not cached."""
+    tmp_path = None
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path), suffix='.tmp', delete=False) as f:
+            tmp_path = f.name
+            json.dump(roll_numbers, f)
+        os.replace(tmp_path, path)
+        tmp_path = None
+    except (OSError, TypeError, ValueError):
+        pass
+    finally:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+
+@LOAD_SECONDS.timed(file='room_details')
+def load_room_details(source):
+    """Load room details from an Excel, CSV or Parquet file path or file object, checking the required columns."""
+    try:
+        df = _read_table(_read_source_bytes(source), _file_format(source))
+    except Exception as e:
+        raise SeatingPlanError(f"Failed to read room details file: {e}") from e
+    df.columns = df.columns.str.strip()
+
+    if not all(col in df.columns for col in REQUIRED_COLUMNS):
+        raise SeatingPlanError(f"Room details file must contain the following columns: {', '.join(REQUIRED_COLUMNS)}.")
+    return df
+
+
+@LOAD_SECONDS.timed(file='roll_numbers')
+def load_roll_numbers(source, position, cache_dir=None):
+    """
+    Load the roll numbers for one seat position from an Excel, CSV or Parquet file path or file object.
+
+    The roster comes back in compact form (see ``roll_numbers.compact_roll_numbers``). Parsed
+    rosters are cached under ``cache_dir`` (``ROLL_NUMBER_CACHE_DIR`` by default) keyed by a hash
+    of the file contents, so an unchanged roster is not parsed again. Pass ``cache_dir=''`` to skip the cache.
+    """
+    cache_dir = ROLL_NUMBER_CACHE_DIR if cache_dir is None else cache_dir
+    try:
+        data = _read_source_bytes(source)
+    except OSError as e:
+        raise SeatingPlanError(f"Failed to read roll numbers file for {position} roll numbers: {e}") from e
+    file_format = _file_format(source)
+
+    cache_path = _cache_path(cache_dir, file_format, data) if cache_dir else None
+    if cache_path is not None:
+        roll_numbers = _load_cached_roll_numbers(cache_path)
+        if roll_numbers is not None:
+            return compact_roll_numbers(roll_numbers)
+
+    try:
+        roll_numbers = _read_roll_number_column(data, file_format)
+    except Exception as e:
+        raise SeatingPlanError(f"Failed to read roll numbers file for {position} roll numbers: {e}") from e
+    if roll_numbers is None:
+        raise SeatingPlanError(f"'Roll Number' column not found in the file for {position} roll numbers.")
+
+    if cache_path is not None:
+        _store_cached_roll_numbers(cache_path, roll_numbers)
+    return compact_roll_numbers(roll_numbers)
+
+
+def roll_number_paths(room_details_df, students_per_bench):
+    """Return the roster path for each seat position, taken from the first room's Path columns."""
+    paths = []
+    for i in range(students_per_bench):
+        position = SEAT_POSITIONS[i]
+        value = room_details_df.iloc[0][f'{position} Path']
+        input_path = '' if pd.isna(value) else str(value).strip()
+        if not input_path:
+            raise SeatingPlanError(f"No path provided for student position {i + 1}.")
+        paths.append(input_path)
+    return paths
+
+
+@GENERATE_SECONDS.timed()
+def generate_seating_chart(room_number, rows, benches_per_row, students_per_bench, roll_numbers_lists, roll_number_indices, progress_var=None):
+    """Build the seating chart for one room in a single pass using array index arithmetic."""
+    benches_in_room = rows * benches_per_row
+    total_seats = benches_in_room * students_per_bench
+    roll_numbers_exhausted = False
+
+    # One column of roll numbers per seat position, laid out bench by bench
+    seat_roll_numbers = np.empty((benches_in_room, students_per_bench), dtype=object)
+    seat_roll_numbers[:] = ''
+    for seat in range(students_per_bench):
+        roll_numbers = roll_numbers_lists[seat]
+        start = roll_number_indices[seat]
+        available = max(0, min(benches_in_room, len(roll_numbers) - start))
+        if available:
+            seat_roll_numbers[:available, seat] = np.asarray(roll_numbers[start:start + available], dtype=object)
+            roll_number_indices[seat] += available
+        if available < benches_in_room:
+            roll_numbers_exhausted = True
+
+    row_labels = np.array([f'Row {row + 1}' for row in range(rows)], dtype=object)
+    bench_labels = np.array([f'Bench {bench + 1}' for bench in range(benches_per_row)], dtype=object)
+
+    df = pd.DataFrame({
+        'Room Number': np.full(total_seats, room_number, dtype=object),
+        'Row': np.repeat(row_labels, benches_per_row * students_per_bench),
+        'Bench': np.tile(np.repeat(bench_labels, students_per_bench), rows),
+        'Seat': np.tile(np.arange(1, students_per_bench + 1), benches_in_room),
+        'Roll Number': seat_roll_numbers.ravel(),
+    }).infer_objects()
+
+    # Report progress once for the whole room
+    if progress_var is not None:
+        progress_var.set(100)
+
+    return df, roll_number_indices, roll_numbers_exhausted
+
+
+def register_named_styles(wb):
+    """Add the shared seating chart named styles to a workbook, once per workbook."""
+    for style in NAMED_STYLES:
+        if style.name not in wb.named_styles:
+            # Each workbook binds its own copy, so the module-level styles stay reusable
+            wb.add_named_style(copy(style))
+
+
+def plan_room_layout(num_rows, num_benches, num_seats):
+    """
+    Work out a room's sheet layout from its dimensions alone.
+
+    Every writer takes this plan instead of re-deriving the geometry from the seating DataFrame.
+    Positions are relative to the room's first sheet row; rooms with the same dimensions share one plan.
+    """
+    return _plan_room_layout(int(num_rows), int(num_benches), int(num_seats))
+
+
+@lru_cache(maxsize=None)
+def _plan_room_layout(num_rows, num_benches, num_seats):
+    row_starts = [row * ROW_BLOCK_WIDTH + 1 for row in range(num_rows)]
+    return RoomLayout(
+        num_rows=num_rows,
+        num_benches=num_benches,
+        num_seats=num_seats,
+        num_columns=num_rows * ROW_BLOCK_WIDTH,
+        row_header_spans=tuple((start, start + len(SEAT_POSITIONS) - 1) for start in row_starts),
+        name_columns=tuple(start + offset for start in row_starts for offset in range(len(SEAT_POSITIONS))),
+        seat_columns=tuple(start + seat for start in row_starts for seat in range(num_seats)),
+    )
+
+
+def room_layout_from_seating_df(seating_df):
+    """Plan the layout of a room given only its seating DataFrame (scans it once)."""
+    return plan_room_layout(seating_df['Row'].nunique(), seating_df['Bench'].nunique(), seating_df['Seat'].nunique())
+
+
+def add_room_header(ws, room_number, layout):
+    """Add a room header in the Excel sheet with underlined Room Number and Times New Roman font."""
+    register_named_styles(ws.parent)
+
+    # Add Room Number as the header in a new row
+    ws.append([f"ROOM {room_number}"])
+    header_row = ws.max_row
+
+    # Merge cells for the room number header
+    ws.merge_cells(start_row=header_row, start_column=1, end_row=header_row, end_column=layout.num_columns)
+
+    # Center align and set the font for the room number (Times New Roman, size 20, bold, underlined)
+    ws.cell(row=header_row, column=1).style = ROOM_HEADER_STYLE.name
+
+    # Leave one row spacing between the room number and row numbers
+    ws.append([''])  # Add an empty row for spacing
+
+
+def add_row_headers(ws, layout):
+    """Add headers for each row with Times New Roman font."""
+    register_named_styles(ws.parent)
+    current_row = ws.max_row + 1  # Place below the room header
+    for row_num, (start_column, end_column) in enumerate(layout.row_header_spans, 1):
+        row_header_cell = ws.cell(row=current_row, column=start_column, value=f"Row {row_num}")
+
+        # Merge cells for row header
+        ws.merge_cells(start_row=current_row, start_column=start_column, end_row=current_row, end_column=end_column)
+
+        # Center align and set font to Times New Roman, bold, and size 14
+        row_header_cell.style = ROW_HEADER_STYLE.name
+
+
+def populate_seating_data(ws, seating_df, left_name, middle_name, right_name, layout):
+    """Populate seating data with Times New Roman font and add headers for each bench from the room details."""
+    register_named_styles(ws.parent)
+
+    # Add the header (Names from Excel) above each seat in the bench
+    current_row = ws.max_row + 1
+    names = [left_name, middle_name, right_name] * layout.num_rows
+    for column, name in zip(layout.name_columns, names):
+        ws.column_dimensions[get_column_letter(column)].width = BENCH_WIDTH  # Set width for benches
+        # Center align and set font to Times New Roman, bold, size 14, with a border
+        ws.cell(row=current_row, column=column, value=name).style = SEAT_HEADER_STYLE.name
+
+    # Move to the next row for actual seating data
+    current_row += 1
+
+    # Populate actual seating data below the name headers, one sheet row per bench
+    seating_grid = build_seating_grid(seating_df, layout)
+    for bench in range(layout.num_benches):
+        for column, seat_value in zip(layout.seat_columns, seating_grid[:, bench, :].ravel()):
+            ws.cell(row=current_row, column=column, value=seat_value).style = ROLL_NUMBER_STYLE.name
+
+        # Set row height to accommodate two lines for roll numbers
+        ws.row_dimensions[current_row].height = BENCH_LENGTH
+        current_row += 1
+
+
+def write_room_sheet(ws, room_number, seating_df, left_name, middle_name, right_name, layout=None):
+    """Append one room (header, row headers, names and seats) to a regular worksheet."""
+    layout = layout or room_layout_from_seating_df(seating_df)
+    add_room_header(ws, room_number, layout)
+    add_row_headers(ws, layout)
+    populate_seating_data(ws, seating_df, left_name, middle_name, right_name, layout)
+
+
+def build_seating_grid(seating_df, layout=None):
+    """Pivot a room's seating DataFrame into a dense (row, bench, seat) array of roll numbers.
+
+    Cells with no matching seat in the DataFrame are left as empty strings.
+    """
+    layout = layout or room_layout_from_seating_df(seating_df)
+    shape = (layout.num_rows, layout.num_benches, layout.num_seats)
+    seating_grid = np.full(shape, '', dtype=object)
+
+    # Labels look like 'Row 3' / 'Bench 7'; convert them to zero-based positions
+    row_idx = seating_df['Row'].str.slice(len('Row ')).astype(int).to_numpy() - 1
+    bench_idx = seating_df['Bench'].str.slice(len('Bench ')).astype(int).to_numpy() - 1
+    seat_idx = seating_df['Seat'].astype(int).to_numpy() - 1
+
+    in_bounds = (row_idx < shape[0]) & (bench_idx < shape[1]) & (seat_idx < shape[2])
+    seating_grid[row_idx[in_bounds], bench_idx[in_bounds], seat_idx[in_bounds]] = \
+        seating_df['Roll Number'].to_numpy(dtype=object)[in_bounds]
+    return seating_grid
+
+
+def write_room_sheet_streaming(ws, room_number, seating_df, left_name, middle_name, right_name, layout=None):
+    """Stream one room into a write-only worksheet with the same layout as write_room_sheet."""
+    layout = layout or room_layout_from_seating_df(seating_df)
+    seating_grid = build_seating_grid(seating_df, layout)
+
+    register_named_styles(ws.parent)
+
+    def styled_row(columns, values, style):
+        cells = [None] * layout.num_columns
+        for column, value in zip(columns, values):
+            cell = WriteOnlyCell(ws, value=value)
+            cell.style = style.name
+            cells[column - 1] = cell
+        return cells
+
+    # Column widths are written before the first row, so they must be declared up front
+    for column in layout.name_columns:
+        ws.column_dimensions[get_column_letter(column)].width = BENCH_WIDTH
+
+    # Room number header, merged across every row block
+    ws.append(styled_row([1], [f"ROOM {room_number}"], ROOM_HEADER_STYLE))
+    ws.merged_cells.add(CellRange(min_row=1, min_col=1, max_row=1, max_col=layout.num_columns))
+    ws.append([''])  # Add an empty row for spacing
+
+    # Row headers, each merged across its three seat columns
+    ws.append(styled_row([start for start, _ in layout.row_header_spans],
+                         [f"Row {row_num}" for row_num in range(1, layout.num_rows + 1)], ROW_HEADER_STYLE))
+    for start_column, end_column in layout.row_header_spans:
+        ws.merged_cells.add(CellRange(min_row=3, min_col=start_column, max_row=3, max_col=end_column))
+
+    # Names above each seat position
+    ws.append(styled_row(layout.name_columns, [left_name, middle_name, right_name] * layout.num_rows, SEAT_HEADER_STYLE))
+
+    # One worksheet row per bench; row heights must be set before the row is streamed
+    for bench in range(layout.num_benches):
+        ws.row_dimensions[5 + bench].height = BENCH_LENGTH
+        ws.append(styled_row(layout.seat_columns, seating_grid[:, bench, :].ravel(), ROLL_NUMBER_STYLE))
+
+    # Flush the sheet to its temporary file so its rows are not held until the workbook is saved
+    ws.close()
+
+
+def room_specs_from_details(room_details_df):
+    """Return (sheet name, room number, rows, benches per row, left/middle/right names) for every room."""
+    return [
+        (f"Room {room_idx + 1}", row['Room Number'], int(row['Number of Rows']), int(row['Number of Bench']),
+         row['Left Name'], row['Middle Name'], row['Right Name'])
+        for room_idx, row in room_details_df.iterrows()
+    ]
+
+
+def plan_room_roll_numbers(room_specs, students_per_bench, roll_numbers_lists, roll_number_indices, refill_roll_numbers=None):
+    """Cheap first pass: slice out the roll numbers every room will use from the room dimensions alone.
+
+    Follows the same exhaustion rules as the sequential loop in main(), calling
+    ``refill_roll_numbers(position)`` in room order whenever a roster runs out.
+    """
+    room_roll_numbers = []
+    for _, _, rows, benches_per_row, _, _, _ in room_specs:
+        benches_in_room = rows * benches_per_row
+        room_slices = []
+        roll_numbers_exhausted = False
+        for seat in range(students_per_bench):
+            roll_numbers = roll_numbers_lists[seat]
+            start = roll_number_indices[seat]
+            available = max(0, min(benches_in_room, len(roll_numbers) - start))
+            room_slices.append(roll_numbers[start:start + available])
+            roll_number_indices[seat] += available
+            if available < benches_in_room:
+                roll_numbers_exhausted = True
+        room_roll_numbers.append(room_slices)
+
+        if roll_numbers_exhausted and refill_roll_numbers is not None:
+            for i in range(students_per_bench):
+                if roll_number_indices[i] >= len(roll_numbers_lists[i]):
+                    roll_numbers_lists[i] = compact_roll_numbers(refill_roll_numbers(SEAT_POSITIONS[i]) or [])
+                    roll_number_indices[i] = 0
+    return room_roll_numbers
+
+
+def render_room_sheet_xml(room_spec, students_per_bench, room_slices):
+    """Render one room in its own write-only workbook (runs in a worker process).
+
+    Returns the path of a temporary file holding the sheet XML, and the workbook's styles XML.
+    Every room registers and uses the shared named styles in the same order, so the style ids
+    in the sheet XML line up with the merged workbook.
+    """
+    _, room_number, rows, benches_per_row, left_name, middle_name, right_name = room_spec
+    seating_chart_df, _, _ = generate_seating_chart(
+        room_number, rows, benches_per_row, students_per_bench, room_slices, [0] * students_per_bench
+    )
+
+    wb = openpyxl.Workbook(write_only=True)
+    write_room_sheet_streaming(wb.create_sheet(), room_number, seating_chart_df, left_name, middle_name, right_name,
+                               plan_room_layout(rows, benches_per_row, students_per_bench))
+    buffer = io.BytesIO()
+    wb.save(buffer)
+
+    with zipfile.ZipFile(buffer) as archive:
+        styles_xml = archive.read('xl/styles.xml')
+        with tempfile.NamedTemporaryFile(suffix='.xml', delete=False) as sheet_file:
+            sheet_file.write(archive.read('xl/worksheets/sheet1.xml'))
+    return sheet_file.name, styles_xml
+
+
+def render_rooms_parallel(room_specs, students_per_bench, roll_numbers_lists, roll_number_indices,
+                          refill_roll_numbers=None, max_workers=None, progress_callback=None):
+    """Render every room sheet across a process pool; returns one (sheet XML path, styles XML) per room."""
+    room_roll_numbers = plan_room_roll_numbers(room_specs, students_per_bench, roll_numbers_lists,
+                                               roll_number_indices, refill_roll_numbers)
+
+    rendered = []
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(render_room_sheet_xml, room_spec, students_per_bench, room_slices)
+                   for room_spec, room_slices in zip(room_specs, room_roll_numbers)]
+        try:
+            for future in futures:
+                rendered.append(future.result())
+                if progress_callback is not None:
+                    progress_callback(len(rendered), len(room_specs))
+        except BaseException:
+            # merge_rendered_rooms is never reached, so remove the sheets rendered so far here,
+            # including those of rooms that finish while the rest are cancelled
+            for future in futures:
+                future.cancel()
+            wait(futures)
+            for future in futures:
+                if not future.cancelled() and future.exception() is None:
+                    os.remove(future.result()[0])
+            raise
+    return rendered
+
+
+def merge_rendered_rooms(room_specs, rendered, output_filename):
+    """Assemble rendered room sheets into a single workbook, identical to the sequential write-only output."""
+    # An empty workbook with the same sheets supplies every package part except the sheets themselves
+    wb = openpyxl.Workbook(write_only=True)
+    register_named_styles(wb)
+    for room_spec in room_specs:
+        wb.create_sheet(title=room_spec[0])
+    skeleton = io.BytesIO()
+    wb.save(skeleton)
+
+    replacements = {f'xl/worksheets/sheet{idx}.xml': sheet_path for idx, (sheet_path, _) in enumerate(rendered, 1)}
+    try:
+        with zipfile.ZipFile(skeleton) as source, \
+                zipfile.ZipFile(output_filename, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as target:
+            for item in source.infolist():
+                if item.filename in replacements:
+                    with open(replacements[item.filename], 'rb') as sheet_file:
+                        target.writestr(item, sheet_file.read())
+                elif item.filename == 'xl/styles.xml' and rendered:
+                    target.writestr(item, rendered[0][1])
+                else:
+                    target.writestr(item, source.read(item.filename))
+    finally:
+        for sheet_path, _ in rendered:
+            os.remove(sheet_path)
+
+
+class SeatingPlanner:
+    """
+    Build seating chart workbooks from room details and roll number sequences.
+
+    ``refill_roll_numbers(position)`` is called when a roster runs out and may return a new
+    sequence for that seat position; without it the remaining seats are left blank.
+    ``progress_callback(rooms_done, total_rooms)`` is called after each room.
+    """
+
+    def __init__(self, room_details_df, roll_numbers_lists, refill_roll_numbers=None, progress_callback=None):
+        if room_details_df.empty:
+            raise SeatingPlanError("Room details file does not list any rooms.")
+
+        self.room_specs = room_specs_from_details(room_details_df)
+        self.students_per_bench = int(room_details_df['Number of Student per Bench'].iloc[0])
+        if not 1 <= self.students_per_bench <= len(SEAT_POSITIONS):
+            raise SeatingPlanError(f"Number of Student per Bench must be between 1 and {len(SEAT_POSITIONS)}.")
+        if len(roll_numbers_lists) < self.students_per_bench:
+            raise SeatingPlanError(f"Expected {self.students_per_bench} roll number lists, got {len(roll_numbers_lists)}.")
+
+        self.roll_numbers_lists = [compact_roll_numbers(roll_numbers) for roll_numbers in roll_numbers_lists[:self.students_per_bench]]
+        self.refill_roll_numbers = refill_roll_numbers
+        self.progress_callback = progress_callback
+
+    @classmethod
+    def from_room_details_file(cls, room_details_source, **kwargs):
+        """Create a planner from a room details file, loading rosters from its Left/Middle/Right Path columns."""
+        room_details_df = load_room_details(room_details_source)
+        students_per_bench = int(room_details_df['Number of Student per Bench'].iloc[0])
+        roll_numbers_lists = [
+            load_roll_numbers(path, position)
+            for path, position in zip(roll_number_paths(room_details_df, students_per_bench), SEAT_POSITIONS)
+        ]
+        return cls(room_details_df, roll_numbers_lists, **kwargs)
+
+    def _report_progress(self, rooms_done):
+        if self.progress_callback is not None:
+            self.progress_callback(rooms_done, len(self.room_specs))
+
+    def iter_rooms(self):
+        """Yield ``(room_spec, seating_df)`` for each room in order, refilling rosters as they run out."""
+        roll_numbers_lists = list(self.roll_numbers_lists)
+        roll_number_indices = [0] * self.students_per_bench
+
+        for rooms_done, room_spec in enumerate(self.room_specs, 1):
+            _, room_number, rows, benches_per_row, _, _, _ = room_spec
+            seating_df, roll_number_indices, roll_numbers_exhausted = generate_seating_chart(
+                room_number, rows, benches_per_row, self.students_per_bench, roll_numbers_lists, roll_number_indices
+            )
+            yield room_spec, seating_df
+
+            if roll_numbers_exhausted and self.refill_roll_numbers is not None:
+                for i in range(self.students_per_bench):
+                    if roll_number_indices[i] >= len(roll_numbers_lists[i]):
+                        roll_numbers_lists[i] = compact_roll_numbers(self.refill_roll_numbers(SEAT_POSITIONS[i]) or [])
+                        roll_number_indices[i] = 0
+
+            self._report_progress(rooms_done)
+
+    def save(self, output, parallel=False, max_workers=None):
+        """
+        Write the seating chart workbook to ``output`` (a path or a binary file object).
+
+        Room sheets are streamed one at a time, or rendered across a process pool with ``parallel``.
+        """
+        if parallel:
+            # Worker processes keep their own metrics, so the parallel render is timed as a whole
+            with RENDER_SECONDS.time(mode='parallel'):
+                rendered = render_rooms_parallel(self.room_specs, self.students_per_bench, list(self.roll_numbers_lists),
+                                                 [0] * self.students_per_bench, self.refill_roll_numbers, max_workers,
+                                                 self.progress_callback)
+            with SAVE_SECONDS.time():
+                merge_rendered_rooms(self.room_specs, rendered, output)
+            return output
+
+        wb = openpyxl.Workbook(write_only=True)
+        for (sheet_name, room_number, rows, benches_per_row, left_name, middle_name, right_name), seating_df in self.iter_rooms():
+            with RENDER_SECONDS.time(mode='room'):
+                write_room_sheet_streaming(wb.create_sheet(title=sheet_name), room_number, seating_df,
+                                           left_name, middle_name, right_name,
+                                           plan_room_layout(rows, benches_per_row, self.students_per_bench))
+        with SAVE_SECONDS.time():
+            wb.save(output)
+        return output
+
+    def to_bytes(self, **kwargs):
+        """Return the finished workbook as bytes."""
+        buffer = io.BytesIO()
+        self.save(buffer, **kwargs)
+        return buffer.getvalue()
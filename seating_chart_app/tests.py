@@ -1,3 +1,961 @@
-from django.test import TestCase
+import io
+import itertools
+import json
+import os
+import asyncio
+import datetime
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import zipfile
+from unittest import mock
 
-# Create your tests here.
+import cv2
+import numpy as np
+import openpyxl
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, SimpleTestCase, override_settings
+from django.urls import reverse
+
+from seating_chart_app import metrics, seating_jobs, seating_planner, views
+from seating_chart_app.frame_batcher import BatcherBusy, FrameBatcher, InvalidFrameError
+from seating_chart_app.frame_sources import SyntheticSource
+from seating_chart_app.landmark_tracker import LandmarkTracker
+from seating_chart_app.makeup_pool import MakeupPool, PoolTimeout
+from seating_chart_app.makeup_processor import EFFECTS, MakeupApplication
+from seating_chart_app.video_pipeline import FrameBroadcaster, VideoPipeline
+from seating_chart_app.roll_numbers import PackedRollNumbers, PrefixedRollNumbers, compact_roll_numbers
+from seating_chart_app.seating_planner import (
+    SeatingPlanner, build_seating_grid, generate_seating_chart, load_roll_numbers,
+)
+
+
+def xlsx_bytes(rows, strip_references=False):
+    """An .xlsx file holding ``rows``, optionally without the optional ``r`` attributes on rows and cells."""
+    wb = openpyxl.Workbook()
+    for row in rows:
+        wb.active.append(row)
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    if not strip_references:
+        return buffer.getvalue()
+
+    stripped = io.BytesIO()
+    with zipfile.ZipFile(buffer) as source, zipfile.ZipFile(stripped, 'w') as target:
+        for item in source.infolist():
+            data = source.read(item)
+            if item.filename == 'xl/worksheets/sheet1.xml':
+                data = re.sub(rb'<(c|row) r="[A-Z0-9]+"', rb'<\1', data)
+            target.writestr(item, data)
+    return stripped.getvalue()
+
+
+def with_phonetic_runs(data, shared_strings=False):
+    """Rewrite an .xlsx from ``xlsx_bytes`` so every string is rich text followed by a phonetic (furigana) run.
+
+    With ``shared_strings`` the strings move from the cells into xl/sharedStrings.xml.
+    """
+    strings = []
+
+    def rich_text(match):
+        text = match.group(1).decode()
+        body = f'<r><t>{text[:2]}</t></r><r><t>{text[2:]}</t></r><rPh sb="0" eb="2"><t>\u30d5\u30ea</t></rPh>'.encode()
+        if not shared_strings:
+            return b't="inlineStr"><is>' + body + b'</is>'
+        strings.append(body)
+        return b't="s"><v>%d</v>' % (len(strings) - 1)
+
+    rewritten = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(data)) as source, zipfile.ZipFile(rewritten, 'w') as target:
+        for item in source.infolist():
+            part = source.read(item)
+            if item.filename == 'xl/worksheets/sheet1.xml':
+                part = re.sub(rb't="inlineStr"><is><t>([^<]*)</t></is>', rich_text, part)
+            elif item.filename == '[Content_Types].xml' and shared_strings:
+                part = part.replace(b'</Types>', b'<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+                                                 b'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>')
+            elif item.filename == 'xl/_rels/workbook.xml.rels' and shared_strings:
+                part = part.replace(b'</Relationships>', b'<Relationship Id="rIdStrings" Target="sharedStrings.xml" Type="http://'
+                                                         b'schemas.openxmlformats.org/officeDocument/2006/relationships/'
+                                                         b'sharedStrings"/></Relationships>')
+            target.writestr(item, part)
+        if shared_strings:
+            target.writestr('xl/sharedStrings.xml', b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                                                    + b''.join(b'<si>%s</si>' % body for body in strings) + b'</sst>')
+    return rewritten.getvalue()
+
+
+class CompactRollNumbersTests(SimpleTestCase):
+    def assertRoundTrip(self, values, container):
+        compact = compact_roll_numbers(values)
+        self.assertIsInstance(compact, container)
+        self.assertEqual(compact.tolist(), values)
+        self.assertEqual(list(compact), values)
+        self.assertEqual([compact[i] for i in range(len(values))], values)
+        self.assertEqual(compact[1:3].tolist(), values[1:3])
+
+    def test_prefixed_keeps_leading_zeros(self):
+        self.assertRoundTrip(['CS001', 'CS002', 'CS010', 'EE0100'], PrefixedRollNumbers)
+
+    def test_plain_integers_stay_integers(self):
+        self.assertRoundTrip([2023001, 2023002, 7, 0], PrefixedRollNumbers)
+
+    def test_mixed_int_and_str(self):
+        self.assertRoundTrip([101, 'CS102', 103, '00104'], PrefixedRollNumbers)
+
+    def test_non_ascii_digits_are_not_renumbered(self):
+        self.assertRoundTrip(['CS\u0661\u0662\u0663', 'CS124', 'CS\uff11\uff12\uff15'], PackedRollNumbers)
+
+    def test_more_than_18_digits(self):
+        # Longer digit runs keep their leading digits in the prefix
+        self.assertRoundTrip(['X1234567890123456789', '0012345678901234567890', 'X2'], PrefixedRollNumbers)
+        self.assertEqual(compact_roll_numbers([10 ** 20, 'CS1']), [10 ** 20, 'CS1'])
+
+    def test_other_types_stay_a_list(self):
+        self.assertEqual(compact_roll_numbers([1.5, 'CS1']), [1.5, 'CS1'])
+
+
+class LoadRollNumbersTests(SimpleTestCase):
+    ROWS = [['Name', 'Roll Number'], ['a', 'CS001'], ['b', None], ['c', 'CS003'], ['d', 4]]
+
+    def load(self, data, cache_dir=''):
+        return list(load_roll_numbers(io.BytesIO(data), 'Left', cache_dir=cache_dir))
+
+    def test_xlsx(self):
+        self.assertEqual(self.load(xlsx_bytes(self.ROWS)), ['CS001', 'CS003', 4])
+
+    def test_xlsx_without_cell_references(self):
+        self.assertEqual(self.load(xlsx_bytes(self.ROWS, strip_references=True)), ['CS001', 'CS003', 4])
+
+    def test_xlsx_phonetic_runs_are_not_part_of_the_text(self):
+        for shared_strings in (False, True):
+            with self.subTest(shared_strings=shared_strings):
+                data = with_phonetic_runs(xlsx_bytes(self.ROWS), shared_strings)
+                self.assertEqual(self.load(data), ['CS001', 'CS003', 4])
+                self.assertEqual(seating_planner._read_xlsx_column(data, 'Roll Number'), ['CS001', 'CS003', 4])
+
+    def test_xlsx_dates_match_pandas(self):
+        rows = [['Roll Number'], [datetime.date(2024, 1, 1)], ['CS002']]
+        self.assertEqual(self.load(xlsx_bytes(rows)), [pd.Timestamp(2024, 1, 1), 'CS002'])
+
+    def test_cache_round_trip_and_failed_write_leaves_no_temp_file(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            data = xlsx_bytes(self.ROWS)
+            self.assertEqual(self.load(data, cache_dir=cache_dir), ['CS001', 'CS003', 4])
+            self.assertEqual(self.load(data, cache_dir=cache_dir), ['CS001', 'CS003', 4])
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+            seating_planner._store_cached_roll_numbers(os.path.join(cache_dir, 'roster.json'), [object()])
+            self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+
+class SeatingChartJobTests(SimpleTestCase):
+    ROOM_DETAILS = (
+        'Room Number,Number of Rows,Number of Bench,Number of Student per Bench,Left Path,Middle Path,Right Path,'
+        'Left Name,Middle Name,Right Name\n'
+        '101,2,3,2,,,,CSE,ECE,\n'
+        '102,2,3,2,,,,CSE,ECE,\n'
+    )
+
+    def setUp(self):
+        jobs_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(jobs_dir.cleanup)
+        self.enterContext(override_settings(SEATING_CHART_JOBS_DIR=jobs_dir.name))
+
+    def upload(self, room_details=ROOM_DETAILS, client=None):
+        def roster(prefix):
+            return 'Roll Number\n' + ''.join(f'{prefix}{i:03d}\n' for i in range(20))
+        return (client or self.client).post(reverse('seating_chart_upload'), {
+            'room_details_file': SimpleUploadedFile('rooms.csv', room_details.encode()),
+            'left_roll_numbers': SimpleUploadedFile('left.csv', roster('CS').encode()),
+            'middle_roll_numbers': SimpleUploadedFile('middle.csv', roster('EC').encode()),
+            'right_roll_numbers': SimpleUploadedFile('right.csv', roster('ME').encode()),
+        })
+
+    def wait_for(self, status_url):
+        deadline = time.monotonic() + 30
+        while True:
+            status = self.client.get(status_url).json()
+            if status['state'] in ('done', 'failed') or time.monotonic() > deadline:
+                return status
+            time.sleep(0.05)
+
+    def test_upload_status_and_download(self):
+        response = self.upload()
+        self.assertEqual(response.status_code, 202)
+        job = response.json()
+
+        status = self.wait_for(job['status_url'])
+        self.assertEqual(status, {'state': 'done', 'rooms_done': 2, 'total_rooms': 2, 'error': None})
+
+        response = self.client.get(job['download_url'])
+        self.assertEqual(response.status_code, 200)
+        wb = openpyxl.load_workbook(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(wb.sheetnames), 2)
+
+    def test_upload_needs_no_csrf_token(self):
+        response = self.upload(client=Client(enforce_csrf_checks=True))
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self.wait_for(response.json()['status_url'])['state'], 'done')
+
+    def test_job_purged_before_download_is_404(self):
+        job = self.upload().json()
+        self.assertEqual(self.wait_for(job['status_url'])['state'], 'done')
+        os.remove(seating_jobs.result_path(job['job_id']))
+        self.assertEqual(self.client.get(job['download_url']).status_code, 404)
+
+    def test_failed_job_reports_error_and_download_conflicts(self):
+        job = self.upload(room_details='Room Number\n101\n').json()
+        status = self.wait_for(job['status_url'])
+        self.assertEqual(status['state'], 'failed')
+        self.assertIn('Room details file must contain', status['error'])
+        self.assertEqual(self.client.get(job['download_url']).status_code, 409)
+
+    def test_failed_save_leaves_no_partial_workbook(self):
+        def partial_save(planner, path):
+            with open(path, 'wb') as f:
+                f.write(b'PK')
+            raise OSError("disk full")
+
+        with mock.patch.object(seating_planner.SeatingPlanner, 'save', partial_save):
+            job = self.upload().json()
+            status = self.wait_for(job['status_url'])
+        self.assertEqual(status['state'], 'failed')
+        self.assertIn('disk full', status['error'])
+        job_dir = seating_jobs.job_dir(job['job_id'])
+        self.assertEqual([name for name in os.listdir(job_dir) if 'seating_chart' in name], [])
+
+    def test_missing_upload_is_rejected(self):
+        response = self.client.post(reverse('seating_chart_upload'), {})
+        self.assertEqual(response.status_code, 400)
+
+    def test_unknown_job_is_404(self):
+        job_id = uuid.uuid4()
+        self.assertEqual(self.client.get(reverse('seating_chart_status', args=[job_id])).status_code, 404)
+        self.assertEqual(self.client.get(reverse('seating_chart_download', args=[job_id])).status_code, 404)
+
+    def write_running_status(self, **owner):
+        job_id = str(uuid.uuid4())
+        os.makedirs(seating_jobs.job_dir(job_id))
+        status = dict({'state': 'running', 'rooms_done': 1, 'total_rooms': 4, 'error': None,
+                       'owner_pid': os.getpid(), 'owner_host': socket.gethostname(),
+                       'updated_at': time.time()}, **owner)
+        with open(os.path.join(seating_jobs.job_dir(job_id), seating_jobs.STATUS_FILENAME), 'w') as f:
+            json.dump(status, f)
+        return job_id
+
+    def test_job_of_a_live_worker_keeps_running(self):
+        job_id = self.write_running_status()
+        self.assertEqual(seating_jobs.get_status(job_id)['state'], 'running')
+
+    def test_job_of_an_exited_worker_is_failed(self):
+        worker = subprocess.run([sys.executable, '-c', 'import os; print(os.getpid())'], capture_output=True, text=True)
+        job_id = self.write_running_status(owner_pid=int(worker.stdout))
+        status = seating_jobs.get_status(job_id)
+        self.assertEqual(status['state'], 'failed')
+        self.assertNotIn('owner_pid', status)
+        self.assertEqual(seating_jobs.get_status(job_id), status)
+
+    def test_job_without_progress_is_failed_by_the_purge(self):
+        job_id = self.write_running_status(updated_at=time.time() - 3600)
+        with override_settings(SEATING_CHART_JOB_TIMEOUT=60):
+            seating_jobs._purge_expired_jobs()
+            self.assertEqual(seating_jobs._read_status(job_id)['state'], 'failed')
+
+    def test_queued_job_does_not_time_out(self):
+        job_id = self.write_running_status(state='queued', updated_at=time.time() - 3600)
+        with override_settings(SEATING_CHART_JOB_TIMEOUT=60):
+            seating_jobs._purge_expired_jobs()
+            self.assertEqual(seating_jobs.get_status(job_id)['state'], 'queued')
+
+
+def textured_frame(height=240, width=320, seed=0):
+    rng = np.random.default_rng(seed)
+    return cv2.GaussianBlur(rng.integers(0, 256, (height, width, 3), dtype=np.uint8), (9, 9), 2)
+
+
+class LandmarkTrackerTests(SimpleTestCase):
+    def test_tracks_between_detections(self):
+        coords = np.array([[100.0, 80.0], [160.0, 120.0], [220.0, 150.0]])
+        detections = []
+        tracker = LandmarkTracker(lambda frame: detections.append(1) or [coords.copy()], detection_interval=3)
+        frame = textured_frame()
+        for _ in range(6):
+            faces = tracker.update(frame)
+        self.assertEqual(len(detections), 2)
+        np.testing.assert_allclose(faces[0], coords, atol=0.5)
+
+    def test_smoothing_does_not_feed_back_into_tracking(self):
+        first = np.array([[100.0, 80.0], [160.0, 120.0], [220.0, 150.0]])
+        second = first + 40
+        detections = iter([[first], [second]])
+        tracker = LandmarkTracker(lambda frame: next(detections), detection_interval=2, smoothing=True,
+                                  min_cutoff=0.1, beta=0.0)
+        frame = textured_frame()
+        timestamps = iter(np.arange(4) / 30)
+
+        tracker.update(frame, next(timestamps))
+        tracker.update(frame, next(timestamps))
+        smoothed = tracker.update(frame, next(timestamps))[0]
+        # The returned landmarks lag behind the jump, while tracking carries on from the detection
+        self.assertTrue((np.abs(smoothed - second) > 10).all())
+        np.testing.assert_array_equal(tracker.faces[0], second)
+        tracker.update(frame, next(timestamps))
+        np.testing.assert_allclose(tracker.faces[0], second, atol=0.5)
+
+    def test_smoothing_restarts_after_the_face_is_lost(self):
+        first = np.array([[100.0, 80.0], [160.0, 120.0], [220.0, 150.0]])
+        second = first + 40
+        detections = iter([[first], [], [second]])
+        tracker = LandmarkTracker(lambda frame: next(detections), smoothing=True, min_cutoff=0.1, beta=0.0)
+        frame = textured_frame()
+
+        tracker.update(frame, 0.0)
+        self.assertEqual(tracker.update(frame, 1 / 30), [])
+        np.testing.assert_array_equal(tracker.update(frame, 2 / 30)[0], second)
+
+    @override_settings(MAKEUP_DETECTION_INTERVAL=3, MAKEUP_TARGET_FPS=24.0, MAKEUP_SMOOTHING=True)
+    def test_camera_app_uses_the_tracking_settings(self):
+        tracker = views.make_camera_app().tracker
+        self.assertEqual((tracker.detection_interval, tracker.target_fps, tracker.smoothing), (3, 24.0, True))
+
+
+class VideoPipelineFrameOwnershipTests(SimpleTestCase):
+    @override_settings(MAKEUP_FRAME_SOURCE='synthetic', MAKEUP_SOURCE_FPS=0, MAKEUP_SOURCE_SIZE=(160, 120))
+    def test_frames_do_not_change_while_being_processed(self):
+        held = []
+
+        def slow_process_frame(frame):
+            before = frame.copy()
+            time.sleep(0.02)
+            held.append(np.array_equal(frame, before))
+            return frame
+
+        pipeline = VideoPipeline(views.open_camera, slow_process_frame)
+        self.assertTrue(pipeline.start())
+        frames = pipeline.frames()
+        for _, _ in zip(range(10), frames):
+            pass
+        frames.close()
+
+        self.assertGreaterEqual(len(held), 10)
+        self.assertTrue(all(held))
+
+
+def legacy_generate_seating_chart(room_number, rows, benches_per_row, students_per_bench, roll_numbers_lists,
+                                  roll_number_indices):
+    """The original seat-by-seat loop, kept as the reference for the vectorized version."""
+    seating_chart = []
+    roll_numbers_exhausted = False
+    for row in range(rows):
+        for bench in range(benches_per_row):
+            for seat in range(students_per_bench):
+                roll_numbers = roll_numbers_lists[seat]
+                if roll_number_indices[seat] < len(roll_numbers):
+                    roll_number = roll_numbers[roll_number_indices[seat]]
+                    roll_number_indices[seat] += 1
+                else:
+                    roll_number = ''
+                    roll_numbers_exhausted = True
+                seating_chart.append([room_number, f'Row {row + 1}', f'Bench {bench + 1}', seat + 1, roll_number])
+    df = pd.DataFrame(seating_chart, columns=['Room Number', 'Row', 'Bench', 'Seat', 'Roll Number'])
+    return df, roll_number_indices, roll_numbers_exhausted
+
+
+class GenerateSeatingChartTests(SimpleTestCase):
+    ROSTERS = [
+        [f'CS{i:03d}' for i in range(40)],
+        list(range(1000, 1025)),
+        ['EE1', 2, 'EE3', 'EE04'] * 3,
+    ]
+
+    def assertMatchesLegacy(self, rows, benches, students_per_bench, start):
+        expected = legacy_generate_seating_chart(101, rows, benches, students_per_bench, self.ROSTERS, list(start))
+        for rosters in (self.ROSTERS, [compact_roll_numbers(roster) for roster in self.ROSTERS]):
+            df, indices, exhausted = generate_seating_chart(101, rows, benches, students_per_bench, rosters, list(start))
+            pd.testing.assert_frame_equal(df, expected[0])
+            self.assertEqual((indices, exhausted), expected[1:])
+
+    def test_full_rooms(self):
+        self.assertMatchesLegacy(2, 3, 3, [0, 0, 0])
+        self.assertMatchesLegacy(3, 2, 1, [5, 0, 0])
+
+    def test_rosters_running_out(self):
+        self.assertMatchesLegacy(4, 4, 3, [30, 10, 0])
+        self.assertMatchesLegacy(2, 2, 2, [40, 25, 12])
+
+
+def legacy_seat_value(seating_df, row, bench, seat):
+    """The original per-cell DataFrame lookup that build_seating_grid replaced."""
+    row_df = seating_df[(seating_df['Bench'] == f'Bench {bench}') & (seating_df['Row'] == f'Row {row}')]
+    return row_df[row_df['Seat'] == seat]['Roll Number'].values[0] if not row_df.empty else ''
+
+
+class BuildSeatingGridTests(SimpleTestCase):
+    def assertMatchesLegacy(self, seating_df):
+        grid = build_seating_grid(seating_df)
+        rows, benches, seats = grid.shape
+        for row in range(rows):
+            for bench in range(benches):
+                for seat in range(seats):
+                    self.assertEqual(grid[row, bench, seat],
+                                     legacy_seat_value(seating_df, row + 1, bench + 1, seat + 1), (row, bench, seat))
+
+    def seating_df(self):
+        rosters = [[f'CS{i:03d}' for i in range(20)], list(range(100, 110)), ['EE1', 'EE2']]
+        return generate_seating_chart(101, 3, 4, 3, rosters, [0, 0, 0])[0]
+
+    def test_matches_the_cell_by_cell_lookup(self):
+        self.assertMatchesLegacy(self.seating_df())
+
+    def test_row_order_and_missing_benches(self):
+        seating_df = self.seating_df().sample(frac=1, random_state=0)
+        # Drop every seat of one bench in one row; the lookup leaves those cells empty
+        missing = (seating_df['Row'] == 'Row 2') & (seating_df['Bench'] == 'Bench 3')
+        self.assertMatchesLegacy(seating_df[~missing])
+
+
+def xlsx_parts(data):
+    """Every part of an .xlsx package except docProps/core.xml, which holds the save time."""
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        return {name: archive.read(name) for name in archive.namelist() if name != 'docProps/core.xml'}
+
+
+class ParallelRenderTests(SimpleTestCase):
+    def room_details(self, rooms):
+        return pd.DataFrame({
+            'Room Number': range(101, 101 + rooms),
+            'Number of Rows': [(2, 3, 1, 4)[room % 4] for room in range(rooms)],
+            'Number of Bench': 5,
+            'Number of Student per Bench': 3,
+            'Left Name': 'CSE',
+            'Middle Name': 'ECE',
+            'Right Name': 'MECH',
+        })
+
+    def assertParallelMatchesSequential(self, make_planner):
+        sequential = xlsx_parts(make_planner().to_bytes())
+        parallel = xlsx_parts(make_planner().to_bytes(parallel=True, max_workers=2))
+        self.assertEqual(sorted(parallel), sorted(sequential))
+        for name in sequential:
+            self.assertEqual(parallel[name], sequential[name], name)
+        return sequential
+
+    def test_parallel_output_is_identical(self):
+        rosters = [[f'CS{i:03d}' for i in range(80)], list(range(1000, 1070)), [f'ME{i}' for i in range(60)]]
+        self.assertParallelMatchesSequential(lambda: SeatingPlanner(self.room_details(6), rosters))
+
+    def test_parallel_output_is_identical_with_refills(self):
+        def make_planner():
+            refills = {position: iter([[f'{position[0]}R{i}' for i in range(7)]] * 3) for position in ('Left', 'Middle', 'Right')}
+            rosters = [[f'CS{i:03d}' for i in range(12)], list(range(1000, 1020)), []]
+            return SeatingPlanner(self.room_details(5), rosters,
+                                  refill_roll_numbers=lambda position: next(refills[position], None))
+        parts = self.assertParallelMatchesSequential(make_planner)
+        self.assertIn(b'RR6', b''.join(parts.values()))
+
+    def test_failed_render_removes_the_rendered_sheets(self):
+        def fail_after_two_rooms(rooms_done, total_rooms):
+            if rooms_done == 2:
+                raise RuntimeError("cancelled")
+
+        rosters = [[f'CS{i:03d}' for i in range(80)], list(range(1000, 1070)), [f'ME{i}' for i in range(60)]]
+        planner = SeatingPlanner(self.room_details(6), rosters, progress_callback=fail_after_two_rooms)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            # Forked workers inherit the patched directory for their sheet files
+            with mock.patch.object(tempfile, 'tempdir', tmp_dir), self.assertRaisesMessage(RuntimeError, "cancelled"):
+                planner.to_bytes(parallel=True, max_workers=2)
+            self.assertEqual(os.listdir(tmp_dir), [])
+
+
+
+def legacy_tint(image, mask, color, blur_kernel_size=(7, 7), blur_sigma=10, color_intensity=0.4):
+    # The original full-frame float blend of the eyeshadow and lipstick effects
+    colored_image = np.zeros_like(image)
+    colored_image[:] = color
+    tinted = cv2.addWeighted(image, 1, cv2.bitwise_and(colored_image, colored_image, mask=mask), color_intensity, 0)
+    blurred = cv2.GaussianBlur(tinted, blur_kernel_size, blur_sigma)
+    gradient_mask = (cv2.GaussianBlur(mask, (15, 15), 0) / 255.0)[..., np.newaxis]
+    with_gradient = (blurred * gradient_mask + image * (1 - gradient_mask)).astype(np.uint8)
+    return np.where(mask[..., np.newaxis] == 0, image, with_gradient)
+
+
+def legacy_blush(app, image, points, color=(128, 0, 128), intensity=0.6):
+    # The original full-frame blush; the ellipse geometry is unchanged, so it comes from blush_layer
+    layer = app.blush_layer(image, points, app.CHEEK_INDEXES, app.CHIN_INDEX, color=color, intensity=1.0)
+    blush_mask = np.zeros(image.shape[:2], dtype=np.uint8)
+    blush_mask[layer.rows, layer.cols] = layer.alpha
+    normalized_mask = (blush_mask / 255.0)[..., np.newaxis]
+    return (image * (1 - normalized_mask * intensity) + np.full_like(image, color) * (normalized_mask * intensity)).astype(np.uint8)
+
+
+def legacy_makeup(app, image, coords, blush=False):
+    """The effect-by-effect pipeline the fused compositor replaced, one full frame per step."""
+    points = coords.astype(np.int32)
+    upper_eyes = [app.get_upper_side_coordinates(coords[eye]).astype(np.int32)
+                  for eye in (app.LEFT_EYE_INDEXES, app.RIGHT_EYE_INDEXES)]
+    lower_eyebrows = [app.get_lower_side_coordinates(coords[eyebrow]).astype(np.int32)
+                      for eyebrow in (app.LEFT_EYEBROW_INDEXES, app.RIGHT_EYEBROW_INDEXES)]
+
+    for upper_eye, lower_eyebrow in zip(upper_eyes, lower_eyebrows):
+        mask = np.zeros(image.shape[:2], dtype=np.uint8)
+        hull = cv2.convexHull(np.concatenate([app.get_upper_side_coordinates(upper_eye), lower_eyebrow[::-1]]))
+        cv2.fillPoly(mask, [hull], 255)
+        image = legacy_tint(image, mask, (170, 80, 160))
+
+    for upper_eye in upper_eyes:
+        eyeliner = upper_eye[np.argsort(upper_eye[:, 0], kind='stable')]
+        for start, end in zip(eyeliner[:-1], eyeliner[1:]):
+            cv2.line(image, tuple(map(int, start)), tuple(map(int, end)), (14, 14, 18), 1)
+
+    mask = np.zeros(image.shape[:2], dtype=np.uint8)
+    cv2.fillPoly(mask, [cv2.convexHull(points[app.LIPS_INDEXES])], 255)
+    image = legacy_tint(image, cv2.dilate(mask, np.ones((3, 3), np.uint8), iterations=1), (0, 0, 255))
+
+    if blush:
+        image = legacy_blush(app, image, points)
+    return image
+
+
+class MakeupCompositorTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.frame = SyntheticSource(size=(640, 480)).read()[1]
+        detector = MakeupApplication(static_image_mode=True)
+        faces = detector.detect_faces(cls.frame)
+        detector.face_mesh.close()
+        cls.coords = faces[0] if faces else None
+
+    def setUp(self):
+        self.assertIsNotNone(self.coords, "FaceMesh found no face in the synthetic frame")
+
+    def assertWithinOneOfLegacy(self, effects, blush):
+        app = MakeupApplication(effects=effects)
+        app.tracker.detect = lambda frame: [self.coords.copy()]
+        result = app.process_frame(self.frame.copy())
+        expected = legacy_makeup(app, self.frame.copy(), self.coords, blush=blush)
+        difference = np.abs(result.astype(np.int16) - expected)
+        self.assertLessEqual(difference.max(), 1)
+        # The effects did change the frame
+        self.assertGreater(np.count_nonzero(np.abs(result.astype(np.int16) - self.frame)), 1000)
+
+    def test_default_effects(self):
+        self.assertWithinOneOfLegacy(('eyeshadow', 'eyeliner', 'lipstick'), blush=False)
+
+    def test_all_effects(self):
+        self.assertWithinOneOfLegacy(EFFECTS, blush=True)
+
+
+class NumberedCapture:
+    """A VideoCapture stand-in whose frames are filled with their frame number (mod 256)."""
+
+    def __init__(self, frames=None, interval=0.0, opened=True):
+        self.frames = frames
+        self.interval = interval
+        self.opened = opened
+        self.released = False
+        self.frames_read = 0
+
+    def isOpened(self):
+        return self.opened and not self.released
+
+    def read(self):
+        if self.released or (self.frames is not None and self.frames_read >= self.frames):
+            return False, None
+        time.sleep(self.interval)
+        frame = np.full((16, 16, 3), self.frames_read % 256, dtype=np.uint8)
+        self.frames_read += 1
+        return True, frame
+
+    def release(self):
+        self.released = True
+
+
+def frame_number(jpeg):
+    return int(round(cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR).mean()))
+
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class VideoPipelineTests(SimpleTestCase):
+    def test_the_last_frame_arrives_before_the_end(self):
+        pipeline = VideoPipeline(lambda: NumberedCapture(frames=20), lambda frame: frame)
+        self.assertTrue(pipeline.start())
+        numbers = [frame_number(jpeg) for jpeg in pipeline.frames()]
+        self.assertEqual(numbers[-1], 19)
+        self.assertEqual(numbers, sorted(set(numbers)))
+
+    def test_a_slow_stage_drops_stale_frames(self):
+        def slow_process_frame(frame):
+            time.sleep(0.01)
+            return frame
+
+        pipeline = VideoPipeline(lambda: NumberedCapture(frames=60, interval=0.001), slow_process_frame)
+        self.assertTrue(pipeline.start())
+        numbers = [frame_number(jpeg) for jpeg in pipeline.frames()]
+        self.assertGreater(pipeline.stats()['dropped']['capture'], 0)
+        self.assertLess(len(numbers), 60)
+        self.assertEqual(numbers, sorted(set(numbers)))
+        self.assertEqual(numbers[-1], 59)
+
+    def test_closing_the_frames_stops_the_pipeline(self):
+        capture = NumberedCapture(interval=0.001)
+        pipeline = VideoPipeline(lambda: capture, lambda frame: frame)
+        self.assertTrue(pipeline.start())
+        frames = pipeline.frames()
+        self.assertEqual(len(list(itertools.islice(frames, 3))), 3)
+        frames.close()
+        self.assertFalse(pipeline.running)
+        self.assertTrue(capture.released)
+
+    def test_start_fails_when_the_capture_does_not_open(self):
+        capture = NumberedCapture(opened=False)
+        self.assertFalse(VideoPipeline(lambda: capture, lambda frame: frame).start())
+        self.assertTrue(capture.released)
+
+
+class FrameBroadcasterTests(SimpleTestCase):
+    def broadcaster(self, **capture_options):
+        captures = []
+
+        def open_capture():
+            captures.append(NumberedCapture(**dict({'interval': 0.002}, **capture_options)))
+            return captures[-1]
+
+        broadcaster = FrameBroadcaster(open_capture, lambda frame: frame, idle_timeout=0.05)
+        return broadcaster, captures
+
+    def test_viewers_share_one_capture(self):
+        broadcaster, captures = self.broadcaster()
+        fast, slow = broadcaster.subscribe(), broadcaster.subscribe()
+        numbers = [frame_number(jpeg) for jpeg in itertools.islice(fast, 30)]
+        self.assertEqual(numbers, sorted(set(numbers)))
+        # The viewer that never reads only misses frames and does not hold up the other one
+        self.assertEqual(sorted(broadcaster.stats()['dropped_per_subscriber'])[0], 0)
+        self.assertGreater(max(broadcaster.stats()['dropped_per_subscriber']), 0)
+        self.assertGreater(frame_number(next(slow)), 0)
+        fast.close()
+        slow.close()
+        self.assertEqual(len(captures), 1)
+
+    def test_capture_is_released_when_idle_and_reopened(self):
+        broadcaster, captures = self.broadcaster()
+        frames = broadcaster.subscribe()
+        next(frames)
+        frames.close()
+        self.assertTrue(wait_until(lambda: captures[0].released))
+        self.assertIsNone(broadcaster.stats()['pipeline'])
+
+        frames = broadcaster.subscribe()
+        next(frames)
+        frames.close()
+        self.assertEqual(len(captures), 2)
+        self.assertTrue(wait_until(lambda: captures[1].released))
+
+    def test_the_end_of_the_capture_ends_every_viewer(self):
+        broadcaster, captures = self.broadcaster(frames=20)
+        first, second = broadcaster.subscribe(), broadcaster.subscribe()
+        self.assertLessEqual(len(list(first)), 20)
+        self.assertLessEqual(len(list(second)), 20)
+        self.assertTrue(wait_until(lambda: captures[0].released))
+
+    def test_no_viewer_without_a_capture(self):
+        broadcaster, captures = self.broadcaster(opened=False)
+        self.assertIsNone(broadcaster.subscribe())
+        self.assertIsNone(asyncio.run(broadcaster.subscribe_async()))
+
+    def test_async_viewers(self):
+        broadcaster, captures = self.broadcaster()
+
+        async def watch(count):
+            frames = await broadcaster.subscribe_async()
+            numbers = []
+            try:
+                async for jpeg in frames:
+                    numbers.append(frame_number(jpeg))
+                    if len(numbers) == count:
+                        return numbers
+            finally:
+                await frames.aclose()
+
+        async def main():
+            return await asyncio.gather(watch(5), watch(10))
+
+        short, long = asyncio.run(main())
+        self.assertEqual((len(short), len(long)), (5, 10))
+        self.assertEqual(long, sorted(set(long)))
+        self.assertEqual(len(captures), 1)
+        self.assertTrue(wait_until(lambda: broadcaster.stats()['async_subscribers'] == 0))
+        self.assertTrue(wait_until(lambda: captures[0].released))
+
+
+class InvertingApp:
+    """A MakeupApplication stand-in that inverts the frame, optionally waiting for ``gate`` first."""
+
+    def __init__(self, delay=0.0, gate=None):
+        self.delay = delay
+        self.gate = gate
+
+    def process_frame(self, frame):
+        if self.gate is not None:
+            self.gate.wait()
+        time.sleep(self.delay)
+        return 255 - frame
+
+
+def encoded_frame(value, extension='.png'):
+    return cv2.imencode(extension, np.full((8, 8, 3), value, dtype=np.uint8))[1].tobytes()
+
+
+def decoded_value(data):
+    return int(round(cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR).mean()))
+
+
+class FrameBatcherTests(SimpleTestCase):
+    def batcher(self, app_factory=InvertingApp, pool_size=2, **options):
+        batcher = FrameBatcher(MakeupPool(app_factory, max_size=pool_size, warm_up=None), **options)
+        self.addCleanup(batcher.close)
+        return batcher
+
+    def test_frames_come_back_processed_in_their_own_format(self):
+        batcher = self.batcher()
+        data, content_type = batcher.process(encoded_frame(10, '.png'), timeout=5)
+        self.assertEqual((content_type, decoded_value(data)), ('image/png', 245))
+        data, content_type = batcher.process(encoded_frame(200, '.jpg'), timeout=5)
+        self.assertEqual(content_type, 'image/jpeg')
+        self.assertAlmostEqual(decoded_value(data), 55, delta=2)
+
+    def test_invalid_frames_are_rejected(self):
+        batcher = self.batcher()
+        with self.assertRaises(InvalidFrameError):
+            batcher.process(b'not an image', timeout=5)
+        with self.assertRaises(InvalidFrameError):
+            batcher.process(b'\xff\xd8\xff' + b'truncated', timeout=5)
+
+    def test_waiting_frames_are_batched_and_matched_to_their_futures(self):
+        batcher = self.batcher(lambda: InvertingApp(delay=0.005), pool_size=1, workers=1, max_batch_size=4,
+                               max_batch_latency=0.05)
+        futures = [batcher.submit(encoded_frame(value)) for value in range(0, 240, 10)]
+        self.assertEqual([decoded_value(future.result(5)[0]) for future in futures], list(range(255, 15, -10)))
+        stats = batcher.stats()
+        self.assertEqual(stats['frames'], 24)
+        self.assertGreater(stats['avg_batch_size'], 1)
+
+    def test_overload_is_turned_away(self):
+        gate = threading.Event()
+        batcher = self.batcher(lambda: InvertingApp(gate=gate), pool_size=1, workers=1, max_batch_size=1,
+                               max_pending=2)
+        futures = []
+        with self.assertRaises(BatcherBusy):
+            for _ in range(10):
+                futures.append(batcher.submit(encoded_frame(0)))
+        self.assertLessEqual(len(futures), 3)
+        gate.set()
+        for future in futures:
+            self.assertEqual(decoded_value(future.result(5)[0]), 255)
+
+    def test_a_failing_factory_fails_the_batch(self):
+        def broken_factory():
+            raise RuntimeError("no model")
+
+        batcher = self.batcher(broken_factory)
+        with self.assertRaisesMessage(RuntimeError, "no model"):
+            batcher.process(encoded_frame(0), timeout=5)
+
+    def test_makeup_frame_endpoint(self):
+        batcher = self.batcher()
+        with mock.patch.object(views, 'client_frame_batcher', batcher):
+            response = self.client.post(reverse('makeup_frame'), data=encoded_frame(10), content_type='image/png')
+            self.assertEqual((response.status_code, response['Content-Type']), (200, 'image/png'))
+            self.assertEqual(decoded_value(response.content), 245)
+
+            response = self.client.post(reverse('makeup_frame'), {'frame': SimpleUploadedFile('f.png', encoded_frame(10))})
+            self.assertEqual(response.status_code, 200)
+
+            response = self.client.post(reverse('makeup_frame'), data=b'garbage', content_type='image/png')
+            self.assertEqual(response.status_code, 400)
+            response = self.client.post(reverse('makeup_frame'), data=b'', content_type='image/png')
+            self.assertEqual(response.status_code, 400)
+
+            with mock.patch.object(batcher, 'submit', side_effect=BatcherBusy):
+                response = self.client.post(reverse('makeup_frame'), data=encoded_frame(10), content_type='image/png')
+                self.assertEqual(response.status_code, 503)
+
+    def test_makeup_frame_endpoint_needs_no_csrf_token(self):
+        batcher = self.batcher()
+        client = Client(enforce_csrf_checks=True)
+        with mock.patch.object(views, 'client_frame_batcher', batcher):
+            response = client.post(reverse('makeup_frame'), data=encoded_frame(10, '.jpg'), content_type='image/jpeg')
+        self.assertEqual((response.status_code, response['Content-Type']), (200, 'image/jpeg'))
+
+
+class MakeupPoolTests(SimpleTestCase):
+    def recording_pool(self, max_size=2):
+        created, warmed = [], []
+
+        def factory():
+            created.append(InvertingApp())
+            return created[-1]
+
+        return MakeupPool(factory, max_size=max_size, warm_up=warmed.append), created, warmed
+
+    def test_instances_are_created_on_demand_and_reused(self):
+        pool, created, warmed = self.recording_pool(max_size=2)
+        self.assertEqual(pool.stats()['created'], 0)
+        with pool.borrow() as first:
+            pass
+        with pool.borrow() as again:
+            self.assertIs(again, first)
+        with pool.borrow() as first, pool.borrow() as second:
+            self.assertIsNot(first, second)
+        self.assertEqual(len(created), 2)
+        self.assertEqual(warmed, created)
+        self.assertEqual(pool.stats(), {'max_size': 2, 'created': 2, 'idle': 2, 'in_use': 0, 'waits': 0})
+
+    def test_checkout_waits_for_a_full_pool(self):
+        pool, _, _ = self.recording_pool(max_size=1)
+        app = pool.checkout()
+        with self.assertRaises(PoolTimeout):
+            pool.checkout(timeout=0.05)
+        threading.Timer(0.05, pool.checkin, [app]).start()
+        self.assertIs(pool.checkout(timeout=5), app)
+        self.assertEqual(pool.stats()['waits'], 2)
+
+    def test_a_failing_factory_gives_its_slot_back(self):
+        attempts = []
+
+        def flaky_factory():
+            attempts.append(None)
+            if len(attempts) == 1:
+                raise RuntimeError("no model")
+            return InvertingApp()
+
+        pool = MakeupPool(flaky_factory, max_size=1, warm_up=None)
+        with self.assertRaises(RuntimeError):
+            pool.checkout(timeout=0.05)
+        self.assertIsInstance(pool.checkout(timeout=0.05), InvertingApp)
+
+        pool = MakeupPool(flaky_factory, max_size=2, warm_up=None)
+        attempts.clear()
+        with self.assertRaises(RuntimeError):
+            pool.warm()
+        self.assertEqual(pool.stats()['created'], 0)
+        pool.warm()
+        self.assertEqual(pool.stats()['idle'], 2)
+
+    def test_warm_fills_the_pool_once(self):
+        pool, created, warmed = self.recording_pool(max_size=3)
+        pool.warm(count=2)
+        pool.warm(background=True).join(5)
+        pool.warm()
+        self.assertEqual((len(created), len(warmed)), (3, 3))
+        self.assertEqual(pool.stats()['idle'], 3)
+
+    def test_concurrent_borrowers_never_share_an_instance(self):
+        pool, created, _ = self.recording_pool(max_size=3)
+        in_use, overlaps, lock = set(), [], threading.Lock()
+
+        def borrower():
+            for _ in range(50):
+                with pool.borrow(timeout=5) as app:
+                    with lock:
+                        overlaps.append(id(app) in in_use)
+                        in_use.add(id(app))
+                    time.sleep(0.0005)
+                    with lock:
+                        in_use.discard(id(app))
+
+        threads = [threading.Thread(target=borrower) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertFalse(any(overlaps))
+        self.assertLessEqual(len(created), 3)
+        self.assertEqual(pool.stats()['in_use'], 0)
+
+
+class MetricsTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(metrics.enable, metrics.is_enabled())
+        self.prefix = f'test_{uuid.uuid4().hex[:8]}'
+
+    def metric_lines(self, name):
+        return [line for line in metrics.render().splitlines() if re.match(rf'(# \w+ )?{name}(_sum|_count)?\b', line)]
+
+    def test_counters_and_gauges_render_per_label_set(self):
+        frames = metrics.counter(f'{self.prefix}_frames', "Frames seen")
+        self.assertIs(metrics.counter(f'{self.prefix}_frames', "Frames seen"), frames)
+        frames.inc(stage='detect')
+        frames.inc(2, stage='detect')
+        frames.inc(stage='say "hi"\n')
+        streams = metrics.gauge(f'{self.prefix}_streams', "Open streams")
+        streams.set(3)
+        streams.dec()
+        metrics.gauge(f'{self.prefix}_queued', "Queued jobs", fn=lambda: 7)
+
+        self.assertEqual(self.metric_lines(f'{self.prefix}_frames'), [
+            f'# HELP {self.prefix}_frames Frames seen',
+            f'# TYPE {self.prefix}_frames counter',
+            f'{self.prefix}_frames{{stage="detect"}} 3',
+            f'{self.prefix}_frames{{stage="say \\"hi\\"\\n"}} 1',
+        ])
+        self.assertEqual(self.metric_lines(f'{self.prefix}_streams')[2:], [f'{self.prefix}_streams 2'])
+        self.assertEqual(self.metric_lines(f'{self.prefix}_queued')[1:], [
+            f'# TYPE {self.prefix}_queued gauge', f'{self.prefix}_queued 7',
+        ])
+
+    def test_histograms_render_as_summaries(self):
+        seconds = metrics.histogram(f'{self.prefix}_seconds', "Step time", window=100)
+        for value in range(1, 101):
+            seconds.observe(value, step='blend')
+        self.assertEqual(self.metric_lines(f'{self.prefix}_seconds'), [
+            f'# HELP {self.prefix}_seconds Step time',
+            f'# TYPE {self.prefix}_seconds summary',
+            f'{self.prefix}_seconds{{step="blend",quantile="0.5"}} 51',
+            f'{self.prefix}_seconds{{step="blend",quantile="0.95"}} 96',
+            f'{self.prefix}_seconds{{step="blend",quantile="0.99"}} 100',
+            f'{self.prefix}_seconds_sum{{step="blend"}} 5050.0',
+            f'{self.prefix}_seconds_count{{step="blend"}} 100',
+        ])
+
+    def test_timers_only_record_while_enabled(self):
+        seconds = metrics.histogram(f'{self.prefix}_seconds', "Step time")
+        timed_sum = seconds.timed(step='sum')(sum)
+
+        metrics.enable(False)
+        self.assertIs(seconds.time(step='blend'), metrics._NULL_TIMER)
+        with seconds.time(step='blend'):
+            pass
+        self.assertEqual(timed_sum([1, 2]), 3)
+        self.assertEqual(self.metric_lines(f'{self.prefix}_seconds')[2:], [])
+
+        metrics.enable()
+        with seconds.time(step='blend'):
+            pass
+        self.assertEqual(timed_sum([1, 2]), 3)
+        counts = [line for line in self.metric_lines(f'{self.prefix}_seconds') if '_count' in line]
+        self.assertEqual(counts, [f'{self.prefix}_seconds_count{{step="blend"}} 1',
+                                  f'{self.prefix}_seconds_count{{step="sum"}} 1'])
+
+    def test_metrics_endpoint(self):
+        metrics.counter(f'{self.prefix}_hits', "Hits").inc()
+        response = self.client.get(reverse('metrics'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn(f'{self.prefix}_hits 1\n', response.content.decode())
+        self.assertIn('# TYPE video_active_streams gauge', response.content.decode())
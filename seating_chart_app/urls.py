@@ -3,5 +3,12 @@ from seating_chart_app import views
 
 urlpatterns = [
     path('video_feed', views.video_feed, name='video_feed'),
+    path('video_feed/stats', views.video_feed_stats, name='video_feed_stats'),
+    path('makeup/frame', views.makeup_frame, name='makeup_frame'),
+    path('makeup/frame/stats', views.makeup_frame_stats, name='makeup_frame_stats'),
+    path('metrics', views.metrics_view, name='metrics'),
+    path('seating_chart', views.seating_chart_upload, name='seating_chart_upload'),
+    path('seating_chart/<uuid:job_id>/status', views.seating_chart_status, name='seating_chart_status'),
+    path('seating_chart/<uuid:job_id>/download', views.seating_chart_download, name='seating_chart_download'),
     path('', views.index, name='index'),
 ]
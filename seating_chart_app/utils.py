@@ -1,20 +1,22 @@
-import pandas as pd
 import os
-from tkinter import Tk, filedialog, messagebox
 
-# Constants
-SEAT_POSITIONS = ["Left", "Middle", "Right"]
+from . import seating_planner
+from .seating_planner import SEAT_POSITIONS, SeatingPlanError  # noqa: F401 (SEAT_POSITIONS kept for callers)
+
+# tkinter is imported inside the dialog helpers only, so this module also loads on headless servers
 
 def prompt_for_new_roll_numbers(position):
     """
     Prompt the user to select a new file for additional roll numbers.
     This function opens a file dialog allowing the user to select an Excel file.
     """
+    from tkinter import Tk, filedialog, messagebox
+
     root = Tk()
     root.withdraw()  # Hide the root window
     messagebox.showinfo("Roll Numbers Exhausted", f"Please select a new file for {position} roll numbers.")
     
-    input_path = filedialog.askopenfilename(title=f"Select {position} roll numbers file", filetypes=[("Excel files", "*.xlsx *.xls")])
+    input_path = filedialog.askopenfilename(title=f"Select {position} roll numbers file", filetypes=[("Spreadsheet files", "*.xlsx *.xls *.csv *.parquet")])
     
     if os.path.exists(input_path):
         print(f"Selected file for {position} roll numbers: {input_path}")
@@ -26,40 +28,25 @@ def prompt_for_new_roll_numbers(position):
 
 def load_roll_numbers_from_file(filepath, position):
     """
-    Load roll numbers from the specified Excel file.
+    Load roll numbers from the specified Excel file, showing an error dialog on failure.
     """
     try:
-        df = pd.read_excel(filepath)
-        df.columns = df.columns.str.strip()
-
-        if 'Roll Number' not in df.columns:
-            messagebox.showerror("Error", f"'Roll Number' column not found in the Excel file for {position} roll numbers.")
-            return None
-
-        return df['Roll Number'].dropna().tolist()
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to read roll numbers file for {position} roll numbers: {e}")
+        return seating_planner.load_roll_numbers(filepath, position)
+    except SeatingPlanError as e:
+        from tkinter import messagebox
+        messagebox.showerror("Error", str(e))
         return None
 
 
 def load_room_details(filepath):
     """
-    Load room details from an Excel file. Checks for required columns.
+    Load room details from an Excel file. Checks for required columns, showing an error dialog on failure.
     """
     try:
-        df = pd.read_excel(filepath)
-        df.columns = df.columns.str.strip()
-
-        # Check required columns in the room details file
-        required_columns = ['Room Number', 'Number of Rows', 'Number of Bench', 'Number of Student per Bench',
-                            'Left Path', 'Middle Path', 'Right Path', 'Left Name', 'Middle Name', 'Right Name']
-        if not all(col in df.columns for col in required_columns):
-            messagebox.showerror("Error", f"Excel file must contain the following columns: {', '.join(required_columns)}.")
-            return None
-
-        return df
-    except Exception as e:
-        messagebox.showerror("Error", f"Failed to read room details file: {e}")
+        return seating_planner.load_room_details(filepath)
+    except SeatingPlanError as e:
+        from tkinter import messagebox
+        messagebox.showerror("Error", str(e))
         return None
 
 
@@ -67,6 +54,7 @@ def save_seating_chart_to_excel(seating_chart_list, output_filename):
     """
     Save the seating chart data to an Excel file.
     """
+    from tkinter import messagebox
     from openpyxl import Workbook
     from openpyxl.styles import Alignment, Border, Side, Font
 
@@ -98,6 +86,8 @@ def prompt_for_output_file():
     """
     Prompt the user to select a location for saving the output Excel file.
     """
+    from tkinter import Tk, filedialog
+
     root = Tk()
     root.withdraw()  # Hide the root window
     output_path = filedialog.asksaveasfilename(title="Save Seating Chart As", filetypes=[("Excel files", "*.xlsx")])
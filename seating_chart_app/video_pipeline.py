@@ -0,0 +1,394 @@
+"""
+Threaded capture -> process -> JPEG encode pipeline for the makeup video stream.
+
+Each stage runs on its own thread and hands frames on through a one-slot queue. When the next
+stage is still busy, the waiting frame is replaced by the newer one instead of queueing up, so a
+slow stage lowers the frame rate rather than adding latency. OpenCV and MediaPipe release the GIL
+while they work, so the three stages genuinely overlap.
+"""
+
+import asyncio
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from queue import Empty, Full, Queue
+
+from . import metrics
+
+STAGES = ('capture', 'process', 'encode')
+
+# Marks the end of the stream as it is passed down the queues
+_END = object()
+
+_active_pipelines = weakref.WeakSet()
+
+STAGE_SECONDS = metrics.histogram('video_stage_seconds', "Time per frame in each video pipeline stage")
+FRAMES_DROPPED = metrics.counter('video_frames_dropped_total',
+                                 "Frames replaced by a newer one before the next pipeline stage took them")
+SUBSCRIBER_FRAMES_DROPPED = metrics.counter('video_subscriber_frames_dropped_total',
+                                            "Frames a video_feed client missed because it was still sending the previous one")
+
+
+class StageTimer:
+    """Running counters for one pipeline stage; also feeds ``video_stage_seconds`` when metrics are on."""
+
+    def __init__(self, name=None):
+        self.name = name
+        self._lock = threading.Lock()
+        self.frames = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def record(self, seconds):
+        with self._lock:
+            self.frames += 1
+            self.total += seconds
+            self.last = seconds
+            self.max = max(self.max, seconds)
+        if self.name is not None and metrics.is_enabled():
+            STAGE_SECONDS.observe(seconds, stage=self.name)
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'frames': self.frames,
+                'avg_ms': round(self.total / self.frames * 1000, 3) if self.frames else None,
+                'last_ms': round(self.last * 1000, 3),
+                'max_ms': round(self.max * 1000, 3),
+            }
+
+
+class VideoPipeline:
+    """
+    Run ``open_capture()`` (a ``cv2.VideoCapture``-like object), ``process_frame(frame)`` and JPEG
+    encoding on separate threads. Iterate over ``frames()`` to get the encoded JPEG bytes.
+
+    The capture keeps reading while later stages still hold earlier frames, so every ``read()``
+    must return a new array: a frame source must not reuse its buffers (``buffer_count``) here.
+    """
+
+    def __init__(self, open_capture, process_frame, jpeg_quality=None):
+        self.open_capture = open_capture
+        self.process_frame = process_frame
+        # OpenCV is imported by the pipeline that needs it, so importing this module stays cheap
+        import cv2
+        self.encode_params = [] if jpeg_quality is None else [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+
+        self.captured = Queue(maxsize=1)
+        self.processed = Queue(maxsize=1)
+        self.encoded = Queue(maxsize=1)
+        self.timings = {stage: StageTimer(stage) for stage in STAGES}
+        self.dropped = dict.fromkeys(STAGES, 0)
+
+        self._stop = threading.Event()
+        self._threads = []
+        self._capture = None
+
+    def start(self):
+        """Open the capture and start the stage threads; returns False if the capture cannot be opened."""
+        self._capture = self.open_capture()
+        if not self._capture.isOpened():
+            self._capture.release()
+            return False
+
+        for stage, target in zip(STAGES, (self._capture_loop, self._process_loop, self._encode_loop)):
+            thread = threading.Thread(target=target, name=f'video-{stage}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        _active_pipelines.add(self)
+        return True
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout=1)
+        if self._capture is not None:
+            self._capture.release()
+        _active_pipelines.discard(self)
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def frames(self):
+        """Yield encoded JPEG frames until the capture ends; stops the pipeline when closed."""
+        try:
+            yield from self._drain(self.encoded)
+        finally:
+            self.stop()
+
+    def stats(self):
+        return {
+            'running': self.running,
+            'stages': {stage: timer.as_dict() for stage, timer in self.timings.items()},
+            'dropped': dict(self.dropped),
+        }
+
+    def _put_latest(self, queue, item, stage):
+        # Replace a frame the next stage has not picked up yet rather than wait for it
+        while True:
+            try:
+                queue.put_nowait(item)
+                return
+            except Full:
+                try:
+                    queue.get_nowait()
+                    self.dropped[stage] += 1
+                    FRAMES_DROPPED.inc(stage=stage)
+                except Empty:
+                    pass
+
+    def _put_end(self, queue):
+        # The end marker waits for the last frame to be picked up instead of replacing it
+        while not self._stop.is_set():
+            try:
+                queue.put(_END, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def _drain(self, queue):
+        while not self._stop.is_set():
+            try:
+                item = queue.get(timeout=0.1)
+            except Empty:
+                continue
+            if item is _END:
+                return
+            yield item
+
+    def _capture_loop(self):
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                success, frame = self._capture.read()
+                if not success:
+                    break
+                self.timings['capture'].record(time.perf_counter() - start)
+                self._put_latest(self.captured, frame, 'capture')
+        finally:
+            self._put_end(self.captured)
+
+    def _process_loop(self):
+        try:
+            for frame in self._drain(self.captured):
+                start = time.perf_counter()
+                frame = self.process_frame(frame)
+                self.timings['process'].record(time.perf_counter() - start)
+                self._put_latest(self.processed, frame, 'process')
+        finally:
+            self._put_end(self.processed)
+
+    def _encode_loop(self):
+        import cv2
+        try:
+            for frame in self._drain(self.processed):
+                start = time.perf_counter()
+                ret, buffer = cv2.imencode('.jpg', frame, self.encode_params)
+                self.timings['encode'].record(time.perf_counter() - start)
+                if ret:
+                    self._put_latest(self.encoded, buffer.tobytes(), 'encode')
+        finally:
+            self._put_end(self.encoded)
+
+
+def active_pipeline_stats():
+    """Stage timings of every running pipeline in this process."""
+    return [pipeline.stats() for pipeline in list(_active_pipelines)]
+
+
+class _LoopFanout:
+    """
+    Hands frames to the async subscribers on one event loop.
+
+    They all await the same ``next_frame`` future, which the broadcast thread resolves once per
+    frame with a single ``call_soon_threadsafe``. A subscriber that is still sending the previous
+    frame simply picks up the next one, so slow clients miss frames just like sync ones do.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.subscribers = 0
+        self.next_frame = loop.create_future()
+
+    def send(self, item):
+        # Called from the broadcast thread
+        try:
+            self.loop.call_soon_threadsafe(self._publish, item)
+        except RuntimeError:
+            pass  # The event loop has been closed
+
+    def _publish(self, item):
+        future = self.next_frame
+        if future.done():
+            return
+        # The end marker stays in place so every later wait sees it too
+        if item is not _END:
+            self.next_frame = self.loop.create_future()
+        future.set_result(item)
+
+
+class FrameBroadcaster:
+    """
+    Share one camera and one ``VideoPipeline`` between any number of viewers.
+
+    The pipeline starts with the first subscriber, and each frame is captured, processed and
+    encoded once. The same JPEG bytes go to every subscriber through its own one-slot queue, so
+    a slow client only misses frames and never holds up the others. The camera is released
+    once nobody has been watching for ``idle_timeout`` seconds.
+
+    ``subscribe_async()`` serves ASGI views: the blocking camera start-up runs on a small
+    executor of ``executor_workers`` threads, and each viewer after that is only a coroutine.
+    """
+
+    def __init__(self, open_capture, process_frame, jpeg_quality=None, idle_timeout=5.0, executor_workers=2):
+        self.open_capture = open_capture
+        self.process_frame = process_frame
+        self.jpeg_quality = jpeg_quality
+        self.idle_timeout = idle_timeout
+
+        self._lock = threading.Lock()
+        self._pipeline = None
+        self._thread = None
+        self._subscribers = {}  # Queue -> frames dropped for that subscriber
+        self._fanouts = {}  # Event loop -> _LoopFanout of its async subscribers
+        self._executor = ThreadPoolExecutor(max_workers=executor_workers, thread_name_prefix='video-feed')
+        self.frames_sent = 0
+
+    def subscribe(self):
+        """Return a generator of JPEG frames, or None if the camera cannot be opened."""
+        queue = Queue(maxsize=1)
+        with self._lock:
+            if not self._ensure_running():
+                return None
+            self._subscribers[queue] = 0
+        return self._frames(queue)
+
+    async def subscribe_async(self):
+        """Return an async iterator of JPEG frames, or None if the camera cannot be opened."""
+        loop = asyncio.get_running_loop()
+        # Opening the camera (or waiting for the previous one to be released) blocks
+        fanout = await loop.run_in_executor(self._executor, self._add_async_subscriber, loop)
+        if fanout is None:
+            return None
+        return self._async_frames(fanout)
+
+    def stats(self):
+        with self._lock:
+            pipeline = self._pipeline
+            return {
+                'subscribers': len(self._subscribers),
+                'async_subscribers': sum(fanout.subscribers for fanout in self._fanouts.values()),
+                'frames_sent': self.frames_sent,
+                'dropped_per_subscriber': list(self._subscribers.values()),
+                'pipeline': pipeline.stats() if pipeline is not None else None,
+            }
+
+    def _ensure_running(self):
+        # Called with the lock held
+        if self._pipeline is not None:
+            return True
+        if self._thread is not None:
+            # The previous broadcast is still releasing the camera
+            self._thread.join()
+        pipeline = VideoPipeline(self.open_capture, self.process_frame, self.jpeg_quality)
+        if not pipeline.start():
+            return False
+        self._pipeline = pipeline
+        self._thread = threading.Thread(target=self._broadcast, args=(pipeline,), name='video-broadcast', daemon=True)
+        self._thread.start()
+        return True
+
+    def _frames(self, queue):
+        try:
+            while True:
+                try:
+                    item = queue.get(timeout=1)
+                except Empty:
+                    if self._thread is None or not self._thread.is_alive():
+                        return
+                    continue
+                if item is _END:
+                    return
+                yield item
+        finally:
+            with self._lock:
+                self._subscribers.pop(queue, None)
+
+    def _add_async_subscriber(self, loop):
+        with self._lock:
+            if not self._ensure_running():
+                return None
+            fanout = self._fanouts.get(loop)
+            if fanout is None:
+                fanout = self._fanouts[loop] = _LoopFanout(loop)
+            fanout.subscribers += 1
+            return fanout
+
+    def _remove_async_subscriber(self, fanout):
+        with self._lock:
+            fanout.subscribers -= 1
+            if not fanout.subscribers and self._fanouts.get(fanout.loop) is fanout:
+                del self._fanouts[fanout.loop]
+
+    async def _async_frames(self, fanout):
+        try:
+            while True:
+                # Shielded, since a viewer disconnecting must not cancel the future the others wait on
+                item = await asyncio.shield(fanout.next_frame)
+                if item is _END:
+                    return
+                yield item
+        finally:
+            # Hand the bookkeeping to the executor rather than wait for the lock on the event loop
+            self._executor.submit(self._remove_async_subscriber, fanout)
+
+    def _offer(self, queue, item):
+        # Called with the lock held; keep only the newest frame for a subscriber that is behind
+        try:
+            queue.put_nowait(item)
+        except Full:
+            try:
+                queue.get_nowait()
+                self._subscribers[queue] += 1
+                SUBSCRIBER_FRAMES_DROPPED.inc()
+            except Empty:
+                pass
+            queue.put_nowait(item)
+
+    def _broadcast(self, pipeline):
+        frames = pipeline.frames()
+        idle_since = None
+        went_idle = False
+        try:
+            for jpeg in frames:
+                with self._lock:
+                    for queue in self._subscribers:
+                        self._offer(queue, jpeg)
+                    for fanout in self._fanouts.values():
+                        fanout.send(jpeg)
+                    self.frames_sent += 1
+
+                    if self._subscribers or self._fanouts:
+                        idle_since = None
+                    elif idle_since is None:
+                        idle_since = time.monotonic()
+                    elif time.monotonic() - idle_since > self.idle_timeout:
+                        self._pipeline = None
+                        went_idle = True
+                        break
+        finally:
+            # Once _pipeline is cleared a new subscriber may be joining this thread while holding
+            # the lock, so only take it here if the camera ended on its own
+            if not went_idle:
+                with self._lock:
+                    self._pipeline = None
+                    for queue in self._subscribers:
+                        self._offer(queue, _END)
+                    for fanout in self._fanouts.values():
+                        fanout.send(_END)
+                    self._fanouts.clear()
+            # Stops the stage threads and releases the camera
+            frames.close()
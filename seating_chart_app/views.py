@@ -1,42 +1,192 @@
-import cv2
-from django.http import StreamingHttpResponse
+import asyncio
+from contextlib import aclosing
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
-from .makeup_processor import MakeupApplication  # Import the MakeupApplication class
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from . import metrics, seating_jobs
+from .forms import SeatingChartForm
+from .frame_batcher import BatcherBusy, FrameBatcher, InvalidFrameError
+from .makeup_pool import MakeupPool
+from .video_pipeline import FrameBroadcaster
+
+
+# MakeupApplication instances are created by their pools on first use (or by warm_up_makeup).
+# The vision modules are imported there too, so loading the URLconf (and serving pages that do
+# not touch the camera) never imports OpenCV or MediaPipe.
+def make_camera_app():
+    from .makeup_processor import MakeupApplication
+    return MakeupApplication(detection_interval=settings.MAKEUP_DETECTION_INTERVAL,
+                             target_fps=settings.MAKEUP_TARGET_FPS or None, smoothing=settings.MAKEUP_SMOOTHING,
+                             inference_long_edge=settings.MAKEUP_INFERENCE_LONG_EDGE or None)
+
+# Frames uploaded by browsers come from many unrelated streams, so their FaceMesh instances
+# detect from scratch instead of tracking from the previous frame they happened to see
+def make_client_frame_app():
+    from .makeup_processor import MakeupApplication
+    return MakeupApplication(static_image_mode=True, inference_long_edge=settings.MAKEUP_INFERENCE_LONG_EDGE or None)
+
+# The webcam is one video, so a single instance keeps FaceMesh tracking it from frame to frame
+camera_apps = MakeupPool(make_camera_app, max_size=1)
+client_frame_apps = MakeupPool(make_client_frame_app, max_size=settings.MAKEUP_POOL_SIZE)
+
+# Create the instances ahead of the first request (see SeatingChartAppConfig.ready)
+def warm_up_makeup():
+    camera_apps.warm(background=True)
+    client_frame_apps.warm(background=True)
+
+# The webcam by default, or any other source from MAKEUP_FRAME_SOURCE (a video file, folder of
+# images, RTSP URL or 'synthetic'). Frames are not decoded into reused buffers, since the
+# pipeline's later stages still hold earlier frames while the next ones are captured.
+def open_camera():
+    from .frame_sources import open_frame_source
+    return open_frame_source(settings.MAKEUP_FRAME_SOURCE, loop=True, fps=settings.MAKEUP_SOURCE_FPS or None,
+                             size=settings.MAKEUP_SOURCE_SIZE)
 
-# Initialize the makeup application instance
-makeup_app = MakeupApplication()
+# One capture and makeup pipeline per process, shared by every video_feed viewer.
+# The camera is only opened once the first viewer connects.
+camera_broadcaster = FrameBroadcaster(open_camera, camera_apps.process_frame,
+                                      executor_workers=settings.VIDEO_FEED_EXECUTOR_WORKERS)
+
+client_frame_batcher = FrameBatcher(client_frame_apps, workers=settings.MAKEUP_FRAME_WORKERS,
+                                    max_batch_size=settings.MAKEUP_FRAME_BATCH_SIZE,
+                                    max_batch_latency=settings.MAKEUP_FRAME_BATCH_LATENCY_MS / 1000,
+                                    max_pending=settings.MAKEUP_FRAME_MAX_PENDING)
 
 # This view renders the index.html page
 def index(request):
     # Renders the template for the homepage
     return render(request, 'seating_chart_app/upload.html')
 
-# This view streams the video feed processed by the makeup application
-def video_feed(request):
+# This view streams the video feed processed by the makeup application. Under ASGI every viewer
+# is just a coroutine waiting for the shared frames; WSGI servers (runserver, sync gunicorn
+# workers) need a plain iterator, so they get the generator below instead.
+async def video_feed(request):
+    stream = agen(camera_broadcaster) if isinstance(request, ASGIRequest) else gen(camera_broadcaster)
     # Returns a streaming response that will display the processed video feed
-    return StreamingHttpResponse(gen(makeup_app),
-                                 content_type='multipart/x-mixed-replace; boundary=frame')
-
-# Generator function to read frames, process them, and serve as a video stream
-def gen(makeup_app):
-    cap = cv2.VideoCapture(0)  # Attempt to capture video from the webcam
-    
-    if not cap.isOpened():
+    return StreamingHttpResponse(stream, content_type='multipart/x-mixed-replace; boundary=frame')
+
+SEND_SECONDS = metrics.histogram('video_send_seconds', "Time for the server to take one video_feed frame from the stream")
+metrics.gauge('video_active_streams', "Connected video_feed clients",
+              lambda: sum(camera_broadcaster.stats()[key] for key in ('subscribers', 'async_subscribers')))
+metrics.counter('video_frames_broadcast_total', "Frames encoded and offered to the video_feed clients",
+                lambda: camera_broadcaster.frames_sent)
+
+# Generator function to serve the shared, already encoded frames as a video stream.
+# Capture, makeup and JPEG encoding run on their own threads (see video_pipeline.py).
+def gen(broadcaster):
+    frames = broadcaster.subscribe()
+
+    if frames is None:
         # Log or print an error message
         print("Error: Unable to access webcam.")
         return
-        
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            break
 
-        frame = makeup_app.process_frame(frame)
+    for frame in frames:
+        # Resumes once the server has written the previous part to the client
+        with SEND_SECONDS.time():
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+
+# Async version of gen() for ASGI servers; opening the camera runs on the broadcaster's executor
+async def agen(broadcaster):
+    frames = await broadcaster.subscribe_async()
+
+    if frames is None:
+        print("Error: Unable to access webcam.")
+        return
+
+    async with aclosing(frames):
+        async for frame in frames:
+            with SEND_SECONDS.time():
+                yield (b'--frame\r\n'
+                       b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+
+
+# Viewer count, per-stage timings and dropped-frame counts of this process's video stream
+@require_GET
+def video_feed_stats(request):
+    return JsonResponse(camera_broadcaster.stats())
+
+
+# Applies the makeup to one frame sent by the browser, either as the raw request body
+# (Content-Type image/jpeg or image/png) or as the "frame" field of a multipart form,
+# and returns the made-up frame in the same format. It is a stateless image-in, image-out API
+# that reads no session or cookie, so browsers and scripts can post without a CSRF token.
+@csrf_exempt
+@require_POST
+async def makeup_frame(request):
+    if request.content_type == 'multipart/form-data':
+        upload = request.FILES.get('frame')
+        data = upload.read() if upload is not None else b''
+    else:
+        data = request.body
+    if not data:
+        return JsonResponse({'error': "No frame was sent"}, status=400)
+
+    try:
+        image, content_type = await asyncio.wrap_future(client_frame_batcher.submit(data))
+    except InvalidFrameError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    except BatcherBusy:
+        return JsonResponse({'error': "Too many frames are waiting, try again shortly"}, status=503)
+    return HttpResponse(image, content_type=content_type)
+
+# Worker, batch size, timing and pool counters of the client frame endpoint
+@require_GET
+def makeup_frame_stats(request):
+    return JsonResponse({**client_frame_batcher.stats(), 'pool': client_frame_apps.stats()})
+
+
+# Prometheus scrape endpoint: timings (with METRICS_ENABLED), dropped frames and active streams
+@require_GET
+def metrics_view(request):
+    return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# Accepts the seating chart uploads and queues generation, returning a job id right away. This is
+# an API for scripts and pages posting multipart forms: it uses no session or cookie, so it does
+# not ask for a CSRF token.
+@csrf_exempt
+@require_POST
+def seating_chart_upload(request):
+    form = SeatingChartForm(request.POST, request.FILES)
+    if not form.is_valid():
+        return JsonResponse({'errors': form.errors}, status=400)
 
-        ret, buffer = cv2.imencode('.jpg', frame)
-        frame = buffer.tobytes()
+    job_id = seating_jobs.submit(
+        form.cleaned_data['room_details_file'],
+        [form.cleaned_data['left_roll_numbers'], form.cleaned_data['middle_roll_numbers'], form.cleaned_data['right_roll_numbers']],
+    )
+    return JsonResponse({
+        'job_id': job_id,
+        'status_url': reverse('seating_chart_status', args=[job_id]),
+        'download_url': reverse('seating_chart_download', args=[job_id]),
+    }, status=202)
 
-        yield (b'--frame\r\n'
-               b'Content-Type: image/jpeg\r\n\r\n' + frame + b'\r\n')
+# Reports the progress of a seating chart job
+@require_GET
+def seating_chart_status(request, job_id):
+    status = seating_jobs.get_status(str(job_id))
+    if status is None:
+        raise Http404("Unknown seating chart job")
+    return JsonResponse(status)
 
-    cap.release()
+# Streams the finished seating chart workbook
+@require_GET
+def seating_chart_download(request, job_id):
+    status = seating_jobs.get_status(str(job_id))
+    if status is None:
+        raise Http404("Unknown seating chart job")
+    if status['state'] != 'done':
+        return JsonResponse(status, status=409)
+    try:
+        workbook = open(seating_jobs.result_path(str(job_id)), 'rb')
+    except FileNotFoundError:
+        # Expired and purged since the status was read
+        raise Http404("Unknown seating chart job")
+    return FileResponse(workbook, as_attachment=True, filename='seating_chart.xlsx')
@@ -0,0 +1,28 @@
+"""
+Gunicorn settings (used by the Procfile).
+
+With MAKEUP_PRELOAD=True the master process imports the vision and spreadsheet libraries before
+forking, so every worker shares one copy-on-write copy of them instead of importing its own on
+first use. Only the modules are loaded here: MediaPipe graphs and threads do not survive a
+fork, so FaceMesh instances are still created inside each worker (on first use, or at worker
+start with MAKEUP_WARM_UP=True).
+"""
+
+import os
+
+PRELOAD_MODULES = (
+    'numpy',
+    'cv2',
+    'mediapipe',
+    'pandas',
+    'openpyxl',
+)
+
+
+def on_starting(server):
+    if os.environ.get('MAKEUP_PRELOAD', 'False') != 'True':
+        return
+    import importlib
+    for module in PRELOAD_MODULES:
+        importlib.import_module(module)
+    server.log.info("Preloaded %s", ', '.join(PRELOAD_MODULES))
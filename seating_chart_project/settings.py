@@ -140,3 +140,53 @@ SESSION_COOKIE_SECURE = os.environ.get('SESSION_COOKIE_SECURE', 'False') == 'Tru
 CSRF_COOKIE_SECURE = os.environ.get('CSRF_COOKIE_SECURE', 'False') == 'True'
 
 # Use environment variables for secret key and debugging.
+
+
+# Seating chart generation jobs (see seating_chart_app/seating_jobs.py)
+
+SEATING_CHART_JOBS_DIR = os.environ.get('SEATING_CHART_JOBS_DIR', str(BASE_DIR / 'seating_chart_jobs'))
+SEATING_CHART_WORKERS = int(os.environ.get('SEATING_CHART_WORKERS', '2'))
+SEATING_CHART_JOB_TTL = int(os.environ.get('SEATING_CHART_JOB_TTL', str(24 * 60 * 60)))
+# A queued or running job that reports no progress for this many seconds is marked failed
+SEATING_CHART_JOB_TIMEOUT = int(os.environ.get('SEATING_CHART_JOB_TIMEOUT', str(15 * 60)))
+
+
+# Makeup video stream (see seating_chart_app/makeup_processor.py)
+
+# Longest side of the downscaled copy FaceMesh runs on; 0 runs it at full camera resolution
+MAKEUP_INFERENCE_LONG_EDGE = int(os.environ.get('MAKEUP_INFERENCE_LONG_EDGE', '480'))
+
+# Landmark tracking for the camera stream (see seating_chart_app/landmark_tracker.py): run FaceMesh
+# every N frames and track in between; with a target frame rate N rises on its own while frames
+# take too long (0 keeps N fixed); and One-Euro smoothing of the landmarks
+MAKEUP_DETECTION_INTERVAL = int(os.environ.get('MAKEUP_DETECTION_INTERVAL', '1'))
+MAKEUP_TARGET_FPS = float(os.environ.get('MAKEUP_TARGET_FPS', '30'))
+MAKEUP_SMOOTHING = os.environ.get('MAKEUP_SMOOTHING', 'True') == 'True'
+
+# What video_feed shows: a camera index, a video file, a folder of images, an rtsp:// or http://
+# URL, or 'synthetic' for generated test frames (see seating_chart_app/frame_sources.py); plus
+# an optional frame rate cap and a 'WIDTHxHEIGHT' size
+MAKEUP_FRAME_SOURCE = os.environ.get('MAKEUP_FRAME_SOURCE', '0')
+MAKEUP_SOURCE_FPS = float(os.environ.get('MAKEUP_SOURCE_FPS', '0'))
+MAKEUP_SOURCE_SIZE = tuple(int(n) for n in os.environ['MAKEUP_SOURCE_SIZE'].split('x')) \
+    if os.environ.get('MAKEUP_SOURCE_SIZE') else None
+
+# Threads for the blocking camera start-up behind the async video_feed view
+VIDEO_FEED_EXECUTOR_WORKERS = int(os.environ.get('VIDEO_FEED_EXECUTOR_WORKERS', '2'))
+
+# Frames uploaded to makeup/frame: worker threads, the most frames a worker takes at once,
+# how long it waits for a batch to fill, and how many frames may wait in total
+MAKEUP_FRAME_WORKERS = int(os.environ.get('MAKEUP_FRAME_WORKERS', str(min(4, os.cpu_count() or 1))))
+MAKEUP_FRAME_BATCH_SIZE = int(os.environ.get('MAKEUP_FRAME_BATCH_SIZE', '4'))
+MAKEUP_FRAME_BATCH_LATENCY_MS = float(os.environ.get('MAKEUP_FRAME_BATCH_LATENCY_MS', '5'))
+MAKEUP_FRAME_MAX_PENDING = int(os.environ.get('MAKEUP_FRAME_MAX_PENDING', '64'))
+
+# Most MakeupApplication instances (each with its own FaceMesh) for uploaded frames, and
+# whether to create them in the background at startup rather than on the first request
+MAKEUP_POOL_SIZE = int(os.environ.get('MAKEUP_POOL_SIZE', str(MAKEUP_FRAME_WORKERS)))
+MAKEUP_WARM_UP = os.environ.get('MAKEUP_WARM_UP', 'False') == 'True'
+
+
+# Hot-path timers behind /metrics (see seating_chart_app/metrics.py); counters are always on
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'False') == 'True'